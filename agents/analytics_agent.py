@@ -1,12 +1,14 @@
 """Analytics Agent for data analysis, reporting, and visualization"""
-from pathlib import Path
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 import json
+import sys
 import time
+import orjson
 from loguru import logger
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-from agents.base import BaseAgent
+from agents.base import BaseAgent, get_chat_llm, load_prompt, PROMPTS_DIR
 from database.supabase_client import supabase_db_client
 from core.config import settings
 from agents.sql_generator import SQLGenerator
@@ -14,6 +16,56 @@ from agents.sql_generator import SQLGenerator
 # Import shared models to avoid circular import
 from agents.analytics_models import FilterOptions, AnalyticsQuery, AnalyticsResult
 
+PROMPT_PATH = PROMPTS_DIR / "analytics_agent.md"
+
+# orjson output is compact (no whitespace padding); non-str keys are coerced like json.dumps
+JSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+# Chart row keys in priority order (interned - hashes cached for per-row lookups)
+LABEL_KEYS = (sys.intern("label"), sys.intern("name"))
+RADIAL_LABEL_KEYS = LABEL_KEYS + (sys.intern("project_name"),)
+DATE_LABEL_KEYS = (sys.intern("date"), sys.intern("label"))
+VALUE_KEYS = (sys.intern("value"), sys.intern("count"))
+SERIES_VALUE_KEYS = (sys.intern("value"),)
+PROGRESS_VALUE_KEYS = (sys.intern("value"), sys.intern("progress"))
+RADIAL_VALUE_KEYS = PROGRESS_VALUE_KEYS + (sys.intern("avg_progress"),)
+
+
+@lru_cache(maxsize=8)
+def _build_query_llm(model: str, temperature: float):
+    """Structured-output AnalyticsQuery parser, built once per (model, temperature)"""
+    return get_chat_llm(model, temperature).with_structured_output(AnalyticsQuery)
+
+
+def _column_values(data: List[Dict[str, Any]], keys: tuple, default: Any) -> List[Any]:
+    """
+    Extract one chart axis from result rows
+
+    SQL results are homogeneous, so the key is detected once from the first row
+    and rows are indexed directly. Rows missing that key fall back to the
+    per-row lookup over all candidate keys.
+
+    Args:
+        data: Query results
+        keys: Candidate keys in priority order
+        default: Value for rows without any candidate key
+
+    Returns:
+        List of values, one per row
+    """
+    if not data:
+        return []
+
+    first = data[0]
+    for key in keys:
+        if key in first:
+            try:
+                return [row[key] for row in data]
+            except KeyError:
+                break
+
+    return [next((row[k] for k in keys if k in row), default) for row in data]
+
 
 class AnalyticsAgent(BaseAgent):
     """
@@ -41,8 +93,8 @@ class AnalyticsAgent(BaseAgent):
         super().__init__(model=model, temperature=temperature)
         self.db = supabase_db_client
 
-        # Configure LLM with structured output
-        self.query_llm = self.llm.with_structured_output(AnalyticsQuery)
+        # Configure LLM with structured output (shared across instances)
+        self.query_llm = _build_query_llm(model, temperature)
 
         # Initialize SQL Generator
         self.sql_generator = SQLGenerator()
@@ -57,11 +109,10 @@ class AnalyticsAgent(BaseAgent):
 
     def _get_default_prompt(self) -> str:
         """Load system prompt from prompts/analytics_agent.md"""
-        prompt_path = Path(__file__).parent.parent / "prompts" / "analytics_agent.md"
+        prompt_path = PROMPT_PATH
 
         try:
-            with open(prompt_path, "r", encoding="utf-8") as f:
-                prompt = f.read()
+            prompt = load_prompt(str(prompt_path))
             logger.debug(f"Loaded Analytics agent prompt from {prompt_path}")
             return prompt
         except FileNotFoundError:
@@ -316,7 +367,7 @@ class AnalyticsAgent(BaseAgent):
         # Inject parameters safely (escape SQL injection)
         sql = self.sql_generator._inject_parameters_safe(sql, params)
 
-        logger.info(f"Generated SQL: {sql[:200]}...")
+        logger.info("Generated SQL: {:.200}...", sql)
         return sql
 
     def _execute_sql(
@@ -578,9 +629,9 @@ class AnalyticsAgent(BaseAgent):
             return {
                 "type": "pie",
                 "data": {
-                    "labels": [row.get("label", row.get("name", "Unknown")) for row in data],
+                    "labels": _column_values(data, LABEL_KEYS, "Unknown"),
                     "datasets": [{
-                        "data": [row.get("value", row.get("count", 0)) for row in data],
+                        "data": _column_values(data, VALUE_KEYS, 0),
                         "backgroundColor": [
                             "#FF6384", "#36A2EB", "#FFCE56", "#4BC0C0", "#9966FF"
                         ]
@@ -597,10 +648,10 @@ class AnalyticsAgent(BaseAgent):
             return {
                 "type": "bar",
                 "data": {
-                    "labels": [row.get("label", row.get("name", "")) for row in data],
+                    "labels": _column_values(data, LABEL_KEYS, ""),
                     "datasets": [{
                         "label": "Значение",
-                        "data": [row.get("value", row.get("count", 0)) for row in data],
+                        "data": _column_values(data, VALUE_KEYS, 0),
                         "backgroundColor": "#36A2EB"
                     }]
                 },
@@ -615,10 +666,10 @@ class AnalyticsAgent(BaseAgent):
             return {
                 "type": "line",
                 "data": {
-                    "labels": [row.get("date", row.get("label", "")) for row in data],
+                    "labels": _column_values(data, DATE_LABEL_KEYS, ""),
                     "datasets": [{
                         "label": "Динамика",
-                        "data": [row.get("value", 0) for row in data],
+                        "data": _column_values(data, SERIES_VALUE_KEYS, 0),
                         "borderColor": "#36A2EB",
                         "fill": False
                     }]
@@ -634,10 +685,10 @@ class AnalyticsAgent(BaseAgent):
             return {
                 "type": "area",
                 "data": {
-                    "labels": [row.get("date", row.get("label", "")) for row in data],
+                    "labels": _column_values(data, DATE_LABEL_KEYS, ""),
                     "datasets": [{
                         "label": "Объём",
-                        "data": [row.get("value", 0) for row in data],
+                        "data": _column_values(data, SERIES_VALUE_KEYS, 0),
                         "borderColor": "#36A2EB",
                         "backgroundColor": "rgba(54, 162, 235, 0.3)",
                         "fill": True
@@ -654,10 +705,10 @@ class AnalyticsAgent(BaseAgent):
             return {
                 "type": "radar",
                 "data": {
-                    "labels": [row.get("label", row.get("name", "")) for row in data],
+                    "labels": _column_values(data, LABEL_KEYS, ""),
                     "datasets": [{
                         "label": "Показатели",
-                        "data": [row.get("value", row.get("progress", 0)) for row in data],
+                        "data": _column_values(data, PROGRESS_VALUE_KEYS, 0),
                         "borderColor": "#36A2EB",
                         "backgroundColor": "rgba(54, 162, 235, 0.2)"
                     }]
@@ -673,10 +724,10 @@ class AnalyticsAgent(BaseAgent):
             return {
                 "type": "radialBar",
                 "data": {
-                    "labels": [row.get("label", row.get("name", row.get("project_name", ""))) for row in data],
+                    "labels": _column_values(data, RADIAL_LABEL_KEYS, ""),
                     "datasets": [{
                         "label": "Прогресс",
-                        "data": [row.get("value", row.get("progress", row.get("avg_progress", 0))) for row in data]
+                        "data": _column_values(data, RADIAL_VALUE_KEYS, 0)
                     }]
                 },
                 "options": {
@@ -882,8 +933,8 @@ class AnalyticsAgent(BaseAgent):
         if not data:
             return "Данные не найдены."
 
-        # Use LLM to generate natural language summary
-        data_str = json.dumps(data, ensure_ascii=False, indent=2)
+        # Use LLM to generate natural language summary (compact JSON = fewer prompt tokens)
+        data_str = orjson.dumps(data, option=JSON_OPTIONS).decode()
         prompt = f"""На основе следующих данных создай краткий аналитический отчет на русском языке:
 
 Запрос: {query.intent} по {', '.join(query.entities)}
@@ -899,13 +950,19 @@ class AnalyticsAgent(BaseAgent):
             logger.error(f"Summary generation error: {e}")
             return f"Найдено записей: {len(data)}"
 
-    def answer_question(self, question: str, user_role: Optional[str] = None) -> str:
+    def answer_question(
+        self,
+        question: str,
+        user_role: Optional[str] = None,
+        pretty: bool = False
+    ) -> str:
         """
         Process analytics question (for orchestrator compatibility)
 
         Args:
             question: User question
             user_role: User role for RBAC
+            pretty: Indent JSON output (debugging only)
 
         Returns:
             Answer as string (may include JSON for structured data)
@@ -913,7 +970,9 @@ class AnalyticsAgent(BaseAgent):
         result = self.process_analytics(question, user_role)
 
         # Return as JSON for orchestrator to parse
-        return json.dumps(result.model_dump(), ensure_ascii=False, indent=2)
+        if pretty:
+            return orjson.dumps(result.model_dump(), option=JSON_OPTIONS | orjson.OPT_INDENT_2).decode()
+        return orjson.dumps(result.model_dump(), option=JSON_OPTIONS).decode()
 
     def process_message(self, user_message: str, user_role: Optional[str] = None) -> str:
         """Alias for answer_question"""
@@ -1,10 +1,55 @@
 from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import SystemMessage, HumanMessage, AIMessage
 from core.config import settings
 from loguru import logger
 
+# Directory with agent system prompts (prompts/*.md)
+PROMPTS_DIR = Path(__file__).parent.parent / "prompts"
+
+
+@lru_cache(maxsize=16)
+def get_chat_llm(model: str, temperature: float) -> ChatOpenAI:
+    """
+    Get shared ChatOpenAI client for (model, temperature)
+
+    ChatOpenAI holds no per-conversation state, so agents with the same
+    configuration reuse one client (and its HTTP connection pool).
+
+    Args:
+        model: OpenAI model name
+        temperature: Response temperature (0-1)
+
+    Returns:
+        Configured ChatOpenAI instance
+    """
+    return ChatOpenAI(
+        model=model,
+        temperature=temperature,
+        openai_api_key=settings.openai_api_key
+    )
+
+
+@lru_cache(maxsize=None)
+def load_prompt(path: str) -> str:
+    """
+    Read prompt file once per process
+
+    Args:
+        path: Absolute path to prompt markdown file
+
+    Returns:
+        File contents
+
+    Raises:
+        FileNotFoundError: If file doesn't exist (not cached - retried next time)
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
 
 class BaseAgent(ABC):
     """Base class for all agents"""
@@ -27,12 +72,8 @@ class BaseAgent(ABC):
         self.temperature = temperature
         self.system_prompt = system_prompt or self._get_default_prompt()
 
-        # Initialize LangChain ChatOpenAI
-        self.llm = ChatOpenAI(
-            model=model,
-            temperature=temperature,
-            openai_api_key=settings.openai_api_key
-        )
+        # Shared LangChain ChatOpenAI for this configuration
+        self.llm = get_chat_llm(model, temperature)
 
         logger.info(f"Initialized {self.__class__.__name__} with model {model}")
 
@@ -68,3 +109,31 @@ class BaseAgent(ABC):
         except Exception as e:
             logger.error(f"Error in {self.__class__.__name__}.invoke: {e}")
             raise
+
+    async def ainvoke(self, user_message: str) -> str:
+        """
+        Async version of invoke
+
+        Args:
+            user_message: User's input message
+
+        Returns:
+            Agent's response
+        """
+        try:
+            messages = [
+                SystemMessage(content=self.system_prompt),
+                HumanMessage(content=user_message)
+            ]
+
+            logger.debug(f"Invoking {self.__class__.__name__} (async) with message: {user_message}")
+
+            response = await self.llm.ainvoke(messages)
+
+            logger.debug(f"Response from {self.__class__.__name__}: {response.content}")
+
+            return response.content
+
+        except Exception as e:
+            logger.error(f"Error in {self.__class__.__name__}.ainvoke: {e}")
+            raise
@@ -1,12 +1,146 @@
 """MCP Agent for project management via external MCP server"""
+import asyncio
+import hashlib
 import json
+import os
+import re
+import tempfile
+import time
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 import httpx
-from agents.base import BaseAgent
+import orjson
+import yaml
+from tenacity import (
+    AsyncRetrying,
+    Retrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential_jitter,
+)
+from langchain_core.messages import SystemMessage, HumanMessage
+from agents.base import BaseAgent, load_prompt, PROMPTS_DIR
 from core.config import settings
 from loguru import logger
 
+PROMPT_PATH = PROMPTS_DIR / "mcp_agent.md"
+
+
+def _dumps_pretty(data: Any) -> str:
+    """Indented UTF-8 JSON for user-facing output (orjson, non-str keys allowed)"""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+
+# Markdown code fence around LLM JSON answer (closing fence optional, text after it ignored)
+FENCE_RE = re.compile(r"^```(?:json)?\s*(.*?)\s*(?:```|\Z)", re.DOTALL)
+
+# _format_list: keys already shown in the item header, and field types worth listing
+LIST_SKIP_KEYS = frozenset({"name", "title", "id"})
+LIST_SCALAR_TYPES = (str, int, float, bool)
+# Items rendered in full; the rest is summarized (huge lists are unreadable and overflow LLM context)
+MAX_FORMATTED_ITEMS = 500
+
+# Reply when the request can't be mapped to any MCP tool
+UNPARSED_REQUEST_MESSAGE = (
+    "Не удалось определить нужную операцию. "
+    "Пожалуйста, уточните запрос. Например:\n"
+    "- 'Покажи все проекты'\n"
+    "- 'Найди сотрудника Иванов'\n"
+    "- 'Создай проект Тест'"
+)
+
+# Tool-call parse prompt: PREFIX + user message + SUFFIX
+PARSE_PROMPT_PREFIX = """Ты - помощник для парсинга запросов пользователя в вызовы MCP инструментов.
+
+{tools_description}
+
+Проанализируй запрос пользователя и определи:
+1. Какой инструмент нужно вызвать
+2. Какие аргументы передать
+
+ВАЖНО:
+- Выбери ОДИН наиболее подходящий инструмент
+- Извлеки все параметры из запроса пользователя
+- Если параметр не указан явно, НЕ добавляй его
+- Если запрос непонятен или не подходит ни под один инструмент, верни null
+
+Запрос пользователя: """
+
+PARSE_PROMPT_SUFFIX = """
+
+Ответь ТОЛЬКО в формате JSON без markdown:
+{"tool_name": "название_инструмента", "arguments": {"param1": "value1"}}
+
+Или если запрос не подходит:
+null
+"""
+
+# Rules appended to the system prompt for function-calling parsing
+FUNCTION_CALL_RULES = """
+
+Определи по запросу пользователя, какой инструмент MCP вызвать:
+- Вызови ОДИН наиболее подходящий инструмент
+- Извлеки все параметры из запроса пользователя
+- Если параметр не указан явно, НЕ добавляй его
+- Если запрос непонятен или не подходит ни под один инструмент, не вызывай инструменты"""
+
+
+# Fast-path trigger phrases -> tool name (config/mcp_triggers.yaml)
+TRIGGERS_PATH = Path(__file__).parent.parent / "config" / "mcp_triggers.yaml"
+
+
+def _compile_triggers(path: Path) -> Tuple[Optional[re.Pattern], Dict[str, str]]:
+    """
+    Compile all trigger patterns into one regex with a named group per tool
+
+    Group names are generated (g0, g1, ...) - MCP tool names are often not valid
+    Python identifiers (e.g. hyphenated). Tools with invalid patterns are skipped.
+
+    Returns:
+        Tuple of (compiled pattern or None if no triggers, group name -> tool name)
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            triggers = (yaml.safe_load(f) or {}).get("triggers") or {}
+    except FileNotFoundError:
+        return None, {}
+    except Exception as e:
+        logger.warning(f"Failed to load MCP triggers from {path}: {e}")
+        return None, {}
+
+    if not isinstance(triggers, dict):
+        logger.warning(f"Failed to load MCP triggers from {path}: 'triggers' is not a mapping")
+        return None, {}
+
+    groups = []
+    tool_names = {}
+    for tool_name, patterns in triggers.items():
+        if not patterns:
+            continue
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        alternation = "|".join(f"(?:{p})" for p in patterns)
+        try:
+            re.compile(alternation)
+        except re.error as e:
+            logger.warning(f"Invalid MCP trigger pattern for '{tool_name}' in {path}: {e}")
+            continue
+        group = f"g{len(groups)}"
+        groups.append(f"(?P<{group}>{alternation})")
+        tool_names[group] = str(tool_name)
+
+    if not groups:
+        return None, {}
+    try:
+        return re.compile("|".join(groups)), tool_names
+    except re.error as e:
+        # e.g. a pattern defines its own named group that clashes with another one
+        logger.warning(f"Failed to compile MCP triggers from {path}: {e}")
+        return None, {}
+
+
+TRIGGER_RE, TRIGGER_TOOLS = _compile_triggers(TRIGGERS_PATH)
+
 
 class MCPAgent(BaseAgent):
     """Agent for interacting with MCP server via JSON-RPC 2.0"""
@@ -14,6 +148,28 @@ class MCPAgent(BaseAgent):
     # Request timeout in seconds
     REQUEST_TIMEOUT = 30.0
 
+    # How long the on-disk tools/list cache stays valid (seconds)
+    TOOLS_CACHE_TTL = 3600
+
+    # Keep-alive pool for the shared HTTP client
+    CONNECTION_LIMITS = httpx.Limits(
+        max_keepalive_connections=10,
+        max_connections=20,
+        keepalive_expiry=30.0
+    )
+
+    # Transport-level reconnect attempts (connection setup only)
+    TRANSPORT_RETRIES = 2
+
+    # Request attempts with exponential backoff for transient failures
+    MAX_ATTEMPTS = 3
+
+    # Errors raised before the request reached the server - always safe to retry
+    CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+    # Read-only methods - may also be retried after timeouts/dropped connections
+    IDEMPOTENT_METHODS = frozenset({"tools/list"})
+
     def __init__(
         self,
         model: str = None,
@@ -36,16 +192,45 @@ class MCPAgent(BaseAgent):
         self.mcp_url = mcp_url or settings.mcp_server_url
         self._request_id = 0
         self._tools_cache: Optional[List[Dict]] = None
+        self._tools_description: Optional[str] = None
+        # Name -> tool definition for O(1) lookups (kept in sync with _tools_cache)
+        self._tools_by_name: Dict[str, Dict] = {}
+        # JSON-RPC batch support: None = not probed yet (decided on first batch)
+        self._batch_supported: Optional[bool] = None
+        # Parse prompt prefix and the tools description it was rendered from
+        self._parse_prompt_prefix: Optional[str] = None
+        self._parse_prompt_tools: Optional[str] = None
+        # LLM with MCP tools bound for function calling, and the tools list it was bound to
+        self._tool_llm = None
+        self._tool_llm_tools: Optional[List[Dict]] = None
+        # Tools list survives restarts - one file per MCP server URL
+        url_hash = hashlib.sha1(self.mcp_url.encode()).hexdigest()
+        self._tools_cache_path = Path(tempfile.gettempdir()) / f"mcp_tools_{url_hash}.json"
+
+        # One client for all JSON-RPC calls - keeps TCP/TLS connection warm
+        self._client = httpx.Client(
+            timeout=self.REQUEST_TIMEOUT,
+            headers={"Content-Type": "application/json"},
+            transport=httpx.HTTPTransport(
+                retries=self.TRANSPORT_RETRIES,
+                http2=True,
+                limits=self.CONNECTION_LIMITS
+            )
+        )
+        # Async counterpart for concurrent tool calls (aprocess_message, acall_tools).
+        # Created lazily: an AsyncClient is bound to the event loop it first runs on,
+        # so a new one is made when called from a different loop (e.g. another asyncio.run)
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._aclient_loop: Optional[asyncio.AbstractEventLoop] = None
 
         logger.info(f"MCPAgent initialized with model {model}, MCP URL: {self.mcp_url}")
 
     def _get_default_prompt(self) -> str:
         """Load system prompt from prompts/mcp_agent.md"""
-        prompt_path = Path(__file__).parent.parent / "prompts" / "mcp_agent.md"
+        prompt_path = PROMPT_PATH
 
         try:
-            with open(prompt_path, "r", encoding="utf-8") as f:
-                prompt = f.read()
+            prompt = load_prompt(str(prompt_path))
             logger.debug(f"Loaded MCP agent prompt from {prompt_path}")
             return prompt
         except FileNotFoundError:
@@ -56,44 +241,102 @@ class MCPAgent(BaseAgent):
                 "на основе запроса пользователя."
             )
 
+    def _create_async_transport(self) -> httpx.AsyncBaseTransport:
+        """Transport for the async client; HTTP/2 lets concurrent calls share one connection"""
+        return httpx.AsyncHTTPTransport(
+            retries=self.TRANSPORT_RETRIES,
+            http2=True,
+            limits=self.CONNECTION_LIMITS
+        )
+
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Get the async HTTP client for the running event loop, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._release_async_client()
+            self._aclient = httpx.AsyncClient(
+                timeout=self.REQUEST_TIMEOUT,
+                headers={"Content-Type": "application/json"},
+                transport=self._create_async_transport()
+            )
+            self._aclient_loop = loop
+        return self._aclient
+
+    def _release_async_client(self):
+        """
+        Close the async client from outside its event loop
+
+        A client whose loop is already closed has no usable connections left, so it is
+        just dropped; on a live loop the close is scheduled (or run, if the loop is idle).
+        """
+        client, loop = self._aclient, self._aclient_loop
+        self._aclient = None
+        self._aclient_loop = None
+        if client is None or loop is None or loop.is_closed():
+            return
+
+        if loop.is_running():
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+            return
+        try:
+            loop.run_until_complete(client.aclose())
+        except RuntimeError as e:
+            # Another loop is running in this thread - the idle loop cannot be driven from here
+            logger.debug(f"Dropping async MCP client without closing: {e}")
+
+    def close(self):
+        """Close shared HTTP clients and their pooled connections"""
+        self._client.close()
+        self._release_async_client()
+
+    async def aclose(self):
+        """Close both sync and async HTTP clients"""
+        self._client.close()
+        client, loop = self._aclient, self._aclient_loop
+        if client is not None and loop is asyncio.get_running_loop():
+            self._aclient = None
+            self._aclient_loop = None
+            await client.aclose()
+        else:
+            self._release_async_client()
+
+    def __del__(self):
+        client = getattr(self, "_client", None)
+        if client is not None:
+            client.close()
+        if getattr(self, "_aclient", None) is not None:
+            try:
+                self._release_async_client()
+            except Exception:
+                # Interpreter shutdown or a loop in an unusable state - nothing left to release
+                pass
+
     def _get_next_request_id(self) -> int:
         """Get next JSON-RPC request ID"""
         self._request_id += 1
         return self._request_id
 
-    def _make_jsonrpc_request(
-        self,
-        method: str,
-        params: Optional[Dict] = None
-    ) -> Dict[str, Any]:
-        """
-        Make JSON-RPC 2.0 request to MCP server
-
-        Args:
-            method: JSON-RPC method name
-            params: Method parameters
-
-        Returns:
-            Response dict with 'result' or 'error'
-        """
-        payload = {
+    def _build_payload(self, method: str, params: Optional[Dict] = None) -> Dict[str, Any]:
+        """Build JSON-RPC 2.0 request payload"""
+        return {
             "jsonrpc": "2.0",
             "id": self._get_next_request_id(),
             "method": method,
             "params": params or {}
         }
 
-        try:
-            with httpx.Client(timeout=self.REQUEST_TIMEOUT) as client:
-                response = client.post(
-                    self.mcp_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-                response.raise_for_status()
-                return response.json()
+    def _request_error(self, method: str, error: Exception) -> Dict[str, Any]:
+        """
+        Convert transport exception into JSON-RPC error response
 
-        except httpx.TimeoutException:
+        Args:
+            method: JSON-RPC method name
+            error: Exception raised by httpx
+
+        Returns:
+            Response dict with 'error'
+        """
+        if isinstance(error, httpx.TimeoutException):
             logger.error(f"Timeout calling MCP server: {method}")
             return {
                 "error": {
@@ -101,22 +344,145 @@ class MCPAgent(BaseAgent):
                     "message": "Превышено время ожидания ответа от сервера"
                 }
             }
-        except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error from MCP server: {e}")
+        if isinstance(error, httpx.HTTPStatusError):
+            logger.error(f"HTTP error from MCP server: {error}")
             return {
                 "error": {
                     "code": -32001,
-                    "message": f"Ошибка HTTP: {e.response.status_code}"
+                    "message": f"Ошибка HTTP: {error.response.status_code}"
                 }
             }
-        except Exception as e:
-            logger.error(f"Error calling MCP server: {e}")
-            return {
-                "error": {
-                    "code": -32002,
-                    "message": f"Ошибка соединения: {str(e)}"
-                }
+        logger.error(f"Error calling MCP server: {error}")
+        return {
+            "error": {
+                "code": -32002,
+                "message": f"Ошибка соединения: {str(error)}"
             }
+        }
+
+    def _retry_policy(self, method: str) -> Dict[str, Any]:
+        """
+        Tenacity settings for a JSON-RPC method
+
+        tools/call may modify data, so it is only retried when the request
+        never reached the server; read-only methods also retry on timeouts.
+        """
+        if method in self.IDEMPOTENT_METHODS:
+            errors = self.CONNECT_ERRORS + (httpx.TimeoutException, httpx.NetworkError)
+        else:
+            errors = self.CONNECT_ERRORS
+
+        return {
+            "stop": stop_after_attempt(self.MAX_ATTEMPTS),
+            "wait": wait_exponential_jitter(initial=0.1, max=2.0, jitter=0.1),
+            "retry": retry_if_exception_type(errors),
+            "reraise": True
+        }
+
+    def _make_jsonrpc_request(
+        self,
+        method: str,
+        params: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """
+        Make JSON-RPC 2.0 request to MCP server
+
+        Args:
+            method: JSON-RPC method name
+            params: Method parameters
+
+        Returns:
+            Response dict with 'result' or 'error'
+        """
+        payload = self._build_payload(method, params)
+
+        try:
+            for attempt in Retrying(**self._retry_policy(method)):
+                with attempt:
+                    response = self._client.post(self.mcp_url, content=orjson.dumps(payload))
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except Exception as e:
+            return self._request_error(method, e)
+
+    def _make_jsonrpc_batch(self, calls: List[Tuple[str, Optional[Dict]]]) -> List[Dict[str, Any]]:
+        """
+        Send several JSON-RPC requests in one POST (JSON-RPC 2.0 batch)
+
+        Servers without batch support answer the first batch with a 4xx; then
+        batching is disabled for this agent and calls are sent one by one. Any
+        other non-array reply disables batching too, but the batch may already
+        have run, so only side-effect-free methods are re-sent.
+
+        Args:
+            calls: List of (method, params) tuples
+
+        Returns:
+            Response dicts in the same order as calls
+        """
+        if not calls:
+            return []
+
+        if self._batch_supported is False:
+            return [self._make_jsonrpc_request(method, params) for method, params in calls]
+
+        payload = [self._build_payload(method, params) for method, params in calls]
+
+        try:
+            for attempt in Retrying(**self._retry_policy("batch")):
+                with attempt:
+                    response = self._client.post(self.mcp_url, content=orjson.dumps(payload))
+            if response.is_client_error and self._batch_supported is None:
+                # Probe: 4xx on first batch = batch requests rejected
+                data = None
+            else:
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+        except Exception as e:
+            error = self._request_error("batch", e)
+            return [error] * len(calls)
+
+        if not isinstance(data, list):
+            logger.info("MCP server doesn't support JSON-RPC batch, sending requests sequentially")
+            self._batch_supported = False
+            if data is None or all(method in self.IDEMPOTENT_METHODS for method, _ in calls):
+                return [self._make_jsonrpc_request(method, params) for method, params in calls]
+            # Never replay tools/call - the server may have executed the batch already
+            error = {"error": {"code": -32603, "message": "Некорректный ответ сервера на пакетный запрос"}}
+            return [error] * len(calls)
+
+        self._batch_supported = True
+
+        # Batch responses may come in any order - match them by id
+        by_id = {item.get("id"): item for item in data if isinstance(item, dict)}
+        missing = {"error": {"code": -32603, "message": "Сервер не вернул ответ на запрос"}}
+        return [by_id.get(request["id"], missing) for request in payload]
+
+    async def _make_jsonrpc_request_async(
+        self,
+        method: str,
+        params: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        """
+        Make JSON-RPC 2.0 request to MCP server without blocking the event loop
+
+        Args:
+            method: JSON-RPC method name
+            params: Method parameters
+
+        Returns:
+            Response dict with 'result' or 'error'
+        """
+        payload = self._build_payload(method, params)
+
+        try:
+            async for attempt in AsyncRetrying(**self._retry_policy(method)):
+                with attempt:
+                    response = await self._get_async_client().post(self.mcp_url, content=orjson.dumps(payload))
+            response.raise_for_status()
+            return orjson.loads(response.content)
+        except Exception as e:
+            return self._request_error(method, e)
 
     def get_available_tools(self) -> List[Dict]:
         """
@@ -125,20 +491,117 @@ class MCPAgent(BaseAgent):
         Returns:
             List of tool definitions with name, description, inputSchema
         """
-        if self._tools_cache is not None:
+        if self._tools_cache is not None or self._load_tools_from_disk():
             return self._tools_cache
 
-        response = self._make_jsonrpc_request("tools/list")
+        return self._fetch_tools(self._make_jsonrpc_request("tools/list"))
 
+    async def aget_available_tools(self) -> List[Dict]:
+        """Async version of get_available_tools (shares the same cache)"""
+        if self._tools_cache is not None or self._load_tools_from_disk():
+            return self._tools_cache
+
+        return self._fetch_tools(await self._make_jsonrpc_request_async("tools/list"))
+
+    def _fetch_tools(self, response: Dict) -> List[Dict]:
+        """Store tools from a tools/list response (empty list on error)"""
         if "error" in response:
             logger.error(f"Error getting tools list: {response['error']}")
             return []
 
         tools = response.get("result", {}).get("tools", [])
-        self._tools_cache = tools
+        self._store_tools(tools)
         logger.info(f"Loaded {len(tools)} tools from MCP server")
         return tools
 
+    def _has_unknown_tool(self, tool_names: List[str]) -> bool:
+        """Check whether any tool name is missing from the loaded tools list"""
+        return bool(self._tools_by_name) and any(
+            name not in self._tools_by_name for name in tool_names
+        )
+
+    def _load_tools_from_disk(self) -> bool:
+        """
+        Load tools list and its prompt description from disk cache
+
+        Returns:
+            True if a fresh cache entry was loaded
+        """
+        try:
+            with open(self._tools_cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Failed to read MCP tools cache {self._tools_cache_path}: {e}")
+            return False
+
+        if time.time() - cached.get("ts", 0) > self.TOOLS_CACHE_TTL:
+            logger.debug("MCP tools disk cache expired")
+            return False
+
+        self._set_tools(cached["tools"], cached.get("description"))
+        logger.info(f"Loaded {len(self._tools_cache)} tools from disk cache")
+        return True
+
+    def _set_tools(self, tools: List[Dict], description: Optional[str]):
+        """Set in-memory tools cache with its derived lookups"""
+        self._tools_cache = tools
+        self._tools_description = description
+        self._tools_by_name = {tool["name"]: tool for tool in tools if "name" in tool}
+
+    def _store_tools(self, tools: List[Dict]):
+        """Cache tools list and its description in memory and on disk"""
+        self._set_tools(tools, self._render_tools_description(tools))
+
+        try:
+            # Write to temp file + rename so concurrent workers never read a partial file
+            tmp_path = self._tools_cache_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"ts": time.time(), "tools": tools, "description": self._tools_description},
+                    f,
+                    ensure_ascii=False
+                )
+            os.replace(tmp_path, self._tools_cache_path)
+        except Exception as e:
+            logger.warning(f"Failed to write MCP tools cache {self._tools_cache_path}: {e}")
+
+    def _validate_tool_call(self, tool_name: str, arguments: Dict) -> Optional[Dict]:
+        """
+        Validate tool call against cached tools list before hitting the network
+
+        Skipped when the tools list isn't loaded (server decides then).
+
+        Returns:
+            JSON-RPC error response or None if call looks valid
+        """
+        if not self._tools_by_name:
+            return None
+
+        tool = self._tools_by_name.get(tool_name)
+        if tool is None:
+            logger.warning(f"Unknown MCP tool requested: {tool_name}")
+            return {
+                "error": {
+                    "code": -32601,
+                    "message": f"Неизвестный инструмент: {tool_name}"
+                }
+            }
+
+        required = (tool.get("inputSchema") or {}).get("required") or []
+        missing = [name for name in required if name not in arguments]
+        if missing:
+            logger.warning(f"Missing required arguments for {tool_name}: {missing}")
+            return {
+                "error": {
+                    "code": -32602,
+                    "message": f"Не указаны обязательные параметры: {', '.join(missing)}"
+                }
+            }
+
+        return None
+
     def _call_mcp_tool(self, tool_name: str, arguments: Dict) -> Dict:
         """
         Call specific MCP tool
@@ -152,6 +615,14 @@ class MCPAgent(BaseAgent):
         """
         logger.info(f"Calling MCP tool: {tool_name} with args: {arguments}")
 
+        if self._has_unknown_tool([tool_name]):
+            # Cached list may predate a newly deployed tool - refresh once before rejecting
+            self._fetch_tools(self._make_jsonrpc_request("tools/list"))
+
+        invalid = self._validate_tool_call(tool_name, arguments)
+        if invalid:
+            return invalid
+
         response = self._make_jsonrpc_request(
             "tools/call",
             {"name": tool_name, "arguments": arguments}
@@ -164,14 +635,97 @@ class MCPAgent(BaseAgent):
 
         return response
 
-    def _build_tools_description(self) -> str:
-        """Build tools description for LLM prompt"""
-        tools = self.get_available_tools()
+    async def _acall_mcp_tool(self, tool_name: str, arguments: Dict) -> Dict:
+        """Async version of _call_mcp_tool"""
+        logger.info(f"Calling MCP tool (async): {tool_name} with args: {arguments}")
+
+        if self._has_unknown_tool([tool_name]):
+            # Cached list may predate a newly deployed tool - refresh once before rejecting
+            self._fetch_tools(await self._make_jsonrpc_request_async("tools/list"))
 
+        invalid = self._validate_tool_call(tool_name, arguments)
+        if invalid:
+            return invalid
+
+        response = await self._make_jsonrpc_request_async(
+            "tools/call",
+            {"name": tool_name, "arguments": arguments}
+        )
+
+        if "error" in response:
+            logger.error(f"MCP tool error: {response['error']}")
+        else:
+            logger.info(f"MCP tool {tool_name} completed successfully")
+
+        return response
+
+    def call_tools(self, tool_calls: List[Dict]) -> List[Dict]:
+        """
+        Call several independent MCP tools in one JSON-RPC batch round-trip
+
+        Args:
+            tool_calls: List of dicts with 'tool_name' and 'arguments'
+
+        Returns:
+            Responses in the same order as tool_calls
+        """
+        results: List[Optional[Dict]] = []
+        batch: List[Tuple[str, Dict]] = []
+        batch_positions: List[int] = []
+
+        if self._has_unknown_tool([call["tool_name"] for call in tool_calls]):
+            # Cached list may predate a newly deployed tool - refresh once before rejecting
+            self._fetch_tools(self._make_jsonrpc_request("tools/list"))
+
+        for position, call in enumerate(tool_calls):
+            tool_name = call["tool_name"]
+            arguments = call.get("arguments", {})
+            invalid = self._validate_tool_call(tool_name, arguments)
+            results.append(invalid)
+            if invalid is None:
+                batch.append(("tools/call", {"name": tool_name, "arguments": arguments}))
+                batch_positions.append(position)
+
+        logger.info(f"Calling {len(batch)} MCP tools in batch")
+
+        for position, response in zip(batch_positions, self._make_jsonrpc_batch(batch)):
+            if "error" in response:
+                logger.error(f"MCP tool error: {response['error']}")
+            results[position] = response
+
+        return results
+
+    async def acall_tools(self, tool_calls: List[Dict]) -> List[Dict]:
+        """
+        Call several independent MCP tools concurrently
+
+        Args:
+            tool_calls: List of dicts with 'tool_name' and 'arguments'
+
+        Returns:
+            Responses in the same order as tool_calls
+        """
+        return await asyncio.gather(*[
+            self._acall_mcp_tool(call["tool_name"], call.get("arguments", {}))
+            for call in tool_calls
+        ])
+
+    def _build_tools_description(self, tools: Optional[List[Dict]] = None) -> str:
+        """Build tools description for LLM prompt (memoized for the cached tools list)"""
+        if tools is None:
+            tools = self.get_available_tools()
+
+        if tools is self._tools_cache and self._tools_description is not None:
+            return self._tools_description
+
+        return self._render_tools_description(tools)
+
+    def _render_tools_description(self, tools: List[Dict]) -> str:
+        """Render tools list as prompt text"""
         if not tools:
             return "Нет доступных инструментов."
 
-        description = "Доступные инструменты MCP:\n\n"
+        parts = ["Доступные инструменты MCP:\n\n"]
 
         for tool in tools:
             name = tool.get("name", "unknown")
@@ -180,66 +734,52 @@ class MCPAgent(BaseAgent):
             properties = schema.get("properties", {})
             required = schema.get("required", [])
 
-            description += f"### {name}\n"
-            description += f"{desc}\n"
+            parts.append(f"### {name}\n")
+            parts.append(f"{desc}\n")
 
             if properties:
-                description += "Параметры:\n"
+                parts.append("Параметры:\n")
                 for prop_name, prop_info in properties.items():
                     prop_type = prop_info.get("type", "any")
                     prop_desc = prop_info.get("description", "")
                     is_required = "(обязательный)" if prop_name in required else "(опционально)"
-                    description += f"  - {prop_name} ({prop_type}) {is_required}: {prop_desc}\n"
+                    parts.append(f"  - {prop_name} ({prop_type}) {is_required}: {prop_desc}\n")
 
-            description += "\n"
+            parts.append("\n")
 
-        return description
+        return "".join(parts)
 
-    def _parse_tool_call(self, user_message: str) -> Optional[Dict]:
+    def _build_parse_prompt(self, user_message: str, tools_description: str) -> str:
         """
-        Use LLM to parse user message into tool call
+        Build LLM prompt that maps user message to a tool call
 
-        Args:
-            user_message: User's natural language request
-
-        Returns:
-            Dict with 'tool_name' and 'arguments' or None if can't parse
+        The prefix (instructions + tools description) is rendered once per
+        tools description, so only the user message is appended per turn.
+        A stable prefix also lets OpenAI prompt caching kick in.
         """
-        tools_description = self._build_tools_description()
-
-        parse_prompt = f"""Ты - помощник для парсинга запросов пользователя в вызовы MCP инструментов.
-
-{tools_description}
+        if self._parse_prompt_prefix is None or self._parse_prompt_tools != tools_description:
+            self._parse_prompt_prefix = PARSE_PROMPT_PREFIX.format(tools_description=tools_description)
+            self._parse_prompt_tools = tools_description
 
-Проанализируй запрос пользователя и определи:
-1. Какой инструмент нужно вызвать
-2. Какие аргументы передать
+        return self._parse_prompt_prefix + user_message + PARSE_PROMPT_SUFFIX
 
-ВАЖНО:
-- Выбери ОДИН наиболее подходящий инструмент
-- Извлеки все параметры из запроса пользователя
-- Если параметр не указан явно, НЕ добавляй его
-- Если запрос непонятен или не подходит ни под один инструмент, верни null
-
-Запрос пользователя: {user_message}
-
-Ответь ТОЛЬКО в формате JSON без markdown:
-{{"tool_name": "название_инструмента", "arguments": {{"param1": "value1"}}}}
+    def _parse_llm_response(self, response: str) -> Optional[Dict]:
+        """
+        Parse LLM answer into tool call
 
-Или если запрос не подходит:
-null
-"""
+        Args:
+            response: Raw LLM response
 
+        Returns:
+            Dict with 'tool_name' and 'arguments' or None if can't parse
+        """
         try:
-            response = self.invoke(parse_prompt)
             response = response.strip()
 
             # Clean up potential markdown formatting
-            if response.startswith("```"):
-                response = response.split("```")[1]
-                if response.startswith("json"):
-                    response = response[4:]
-                response = response.strip()
+            fence = FENCE_RE.match(response)
+            if fence:
+                response = fence.group(1)
 
             if response.lower() == "null" or response == "":
                 return None
@@ -257,6 +797,135 @@ null
         except json.JSONDecodeError as e:
             logger.warning(f"Failed to parse LLM response as JSON: {e}")
             return None
+
+    def _match_trigger(self, user_message: str) -> Optional[Dict]:
+        """
+        Fast path: map command-like message to an argument-free tool call without LLM
+
+        Args:
+            user_message: User's natural language request
+
+        Returns:
+            Dict with 'tool_name' and empty 'arguments', or None on miss
+        """
+        if TRIGGER_RE is None:
+            return None
+
+        normalized = " ".join(user_message.lower().split()).rstrip(".!?")
+        match = TRIGGER_RE.fullmatch(normalized)
+        if not match:
+            return None
+
+        tool_name = TRIGGER_TOOLS.get(match.lastgroup)
+        if tool_name not in self._tools_by_name:
+            return None
+
+        logger.info(f"Trigger fast path: '{normalized}' -> {tool_name}")
+        return {"tool_name": tool_name, "arguments": {}}
+
+    def _build_openai_tools(self, tools: List[Dict]) -> List[Dict]:
+        """Map MCP tool definitions (inputSchema) to OpenAI function-calling format"""
+        openai_tools = []
+        for tool in tools:
+            parameters = dict(tool.get("inputSchema") or {})
+            parameters.setdefault("type", "object")
+            parameters.setdefault("properties", {})
+            openai_tools.append({
+                "type": "function",
+                "function": {
+                    "name": tool.get("name", "unknown"),
+                    "description": tool.get("description", "Без описания"),
+                    "parameters": parameters
+                }
+            })
+        return openai_tools
+
+    def _get_tool_llm(self, tools: List[Dict]):
+        """
+        Get LLM with MCP tools bound (rebound when tools list changes)
+
+        Returns:
+            Runnable for function calling, or None if provider doesn't support tools
+        """
+        if self._tool_llm is None or self._tool_llm_tools is not tools:
+            try:
+                self._tool_llm = self.llm.bind_tools(
+                    self._build_openai_tools(tools),
+                    parallel_tool_calls=False
+                )
+            except (AttributeError, NotImplementedError):
+                logger.warning("LLM provider doesn't support tool binding, using JSON prompt parser")
+                return None
+            self._tool_llm_tools = tools
+        return self._tool_llm
+
+    def _build_function_call_messages(self, user_message: str) -> List:
+        """Build messages for function-calling parse"""
+        return [
+            SystemMessage(content=self.system_prompt + FUNCTION_CALL_RULES),
+            HumanMessage(content=user_message)
+        ]
+
+    @staticmethod
+    def _tool_call_from_message(message) -> Optional[Dict]:
+        """Extract first tool call from AIMessage as {'tool_name', 'arguments'}"""
+        tool_calls = getattr(message, "tool_calls", None)
+        if not tool_calls:
+            return None
+        return {"tool_name": tool_calls[0]["name"], "arguments": tool_calls[0].get("args") or {}}
+
+    def _parse_tool_call(self, user_message: str) -> Optional[Dict]:
+        """
+        Use LLM function calling to parse user message into tool call
+
+        Command-like messages matching a trigger skip the LLM entirely.
+        Falls back to JSON prompt parsing for providers without tool binding.
+
+        Args:
+            user_message: User's natural language request
+
+        Returns:
+            Dict with 'tool_name' and 'arguments' or None if can't parse
+        """
+        tools = self.get_available_tools()
+        if not tools:
+            return None
+
+        tool_call = self._match_trigger(user_message)
+        if tool_call is not None:
+            return tool_call
+
+        try:
+            tool_llm = self._get_tool_llm(tools)
+            if tool_llm is not None:
+                response = tool_llm.invoke(self._build_function_call_messages(user_message))
+                return self._tool_call_from_message(response)
+
+            # Legacy: JSON text answer
+            parse_prompt = self._build_parse_prompt(user_message, self._build_tools_description(tools))
+            return self._parse_llm_response(self.invoke(parse_prompt))
+        except Exception as e:
+            logger.error(f"Error parsing tool call: {e}")
+            return None
+
+    async def _aparse_tool_call(self, user_message: str) -> Optional[Dict]:
+        """Async version of _parse_tool_call"""
+        tools = await self.aget_available_tools()
+        if not tools:
+            return None
+
+        tool_call = self._match_trigger(user_message)
+        if tool_call is not None:
+            return tool_call
+
+        try:
+            tool_llm = self._get_tool_llm(tools)
+            if tool_llm is not None:
+                response = await tool_llm.ainvoke(self._build_function_call_messages(user_message))
+                return self._tool_call_from_message(response)
+
+            parse_prompt = self._build_parse_prompt(user_message, self._build_tools_description(tools))
+            return self._parse_llm_response(await self.ainvoke(parse_prompt))
         except Exception as e:
             logger.error(f"Error parsing tool call: {e}")
             return None
@@ -299,7 +968,7 @@ null
                 return self._format_data(result["data"], tool_name)
 
             # Return raw result as formatted JSON
-            return f"Результат операции {tool_name}:\n```json\n{json.dumps(result, ensure_ascii=False, indent=2)}\n```"
+            return f"Результат операции {tool_name}:\n```json\n{_dumps_pretty(result)}\n```"
 
         if isinstance(result, list):
             return self._format_list(result, tool_name)
@@ -311,7 +980,7 @@ null
         if isinstance(data, list):
             return self._format_list(data, tool_name)
         elif isinstance(data, dict):
-            return f"```json\n{json.dumps(data, ensure_ascii=False, indent=2)}\n```"
+            return f"```json\n{_dumps_pretty(data)}\n```"
         else:
             return str(data)
 
@@ -320,24 +989,52 @@ null
         if not items:
             return "Ничего не найдено."
 
-        result = f"Найдено элементов: {len(items)}\n\n"
+        parts = [f"Найдено элементов: {len(items)}\n\n"]
+        append = parts.append
+        extend = parts.extend
 
-        for i, item in enumerate(items, 1):
+        for i, item in enumerate(items[:MAX_FORMATTED_ITEMS], 1):
             if isinstance(item, dict):
                 name = item.get("name") or item.get("title") or item.get("id", f"#{i}")
-                result += f"{i}. **{name}**\n"
+                append(f"{i}. **{name}**\n")
 
-                # Add relevant fields
-                for key, value in item.items():
-                    if key not in ["name", "title", "id"] and value:
-                        if isinstance(value, (str, int, float, bool)):
-                            result += f"   - {key}: {value}\n"
+                # Add relevant scalar fields
+                extend(
+                    f"   - {key}: {value}\n"
+                    for key, value in item.items()
+                    if key not in LIST_SKIP_KEYS and value and isinstance(value, LIST_SCALAR_TYPES)
+                )
             else:
-                result += f"{i}. {item}\n"
+                append(f"{i}. {item}\n")
+
+            append("\n")
+
+        if len(items) > MAX_FORMATTED_ITEMS:
+            append(f"... и ещё {len(items) - MAX_FORMATTED_ITEMS} элементов")
+
+        return "".join(parts).strip()
 
-            result += "\n"
+    def _check_tool_permission(self, tool_name: str, user_role: Optional[str]) -> Optional[str]:
+        """
+        RBAC: Check permissions before calling tool (hard permission check)
 
-        return result.strip()
+        Returns:
+            Error message if permission denied, None if allowed
+        """
+        from core.rbac import rbac_manager
+
+        allowed, error_message = rbac_manager.check_permission(
+            role_name=user_role or "guest",
+            tool_name=tool_name
+        )
+
+        if not allowed:
+            # Permission denied - return error message to user
+            logger.warning(f"Permission denied: role='{user_role or 'guest'}', tool='{tool_name}'")
+            return error_message
+
+        logger.info(f"Permission granted: role='{user_role or 'guest'}', tool='{tool_name}'")
+        return None
 
     def process_message(self, user_message: str, user_role: Optional[str] = None) -> str:
         """
@@ -350,9 +1047,7 @@ null
         Returns:
             Formatted response or permission denied error
         """
-        from core.rbac import rbac_manager
-
-        logger.info(f"MCPAgent processing message: {user_message[:100]}...")
+        logger.info("MCPAgent processing message: {:.100}...", user_message)
         logger.info(f"User role: {user_role or 'guest'}")
 
         # Parse user request into tool call
@@ -360,37 +1055,56 @@ null
 
         if tool_call is None:
             logger.warning("Could not parse user request into MCP tool call")
-            return (
-                "Не удалось определить нужную операцию. "
-                "Пожалуйста, уточните запрос. Например:\n"
-                "- 'Покажи все проекты'\n"
-                "- 'Найди сотрудника Иванов'\n"
-                "- 'Создай проект Тест'"
-            )
+            return UNPARSED_REQUEST_MESSAGE
 
         tool_name = tool_call.get("tool_name")
         arguments = tool_call.get("arguments", {})
 
         logger.info(f"Parsed tool call: {tool_name} with {arguments}")
 
-        # RBAC: Check permissions before calling tool (hard permission check)
-        allowed, error_message = rbac_manager.check_permission(
-            role_name=user_role or "guest",
-            tool_name=tool_name
-        )
-
-        if not allowed:
-            # Permission denied - return error message to user
-            logger.warning(f"Permission denied: role='{user_role or 'guest'}', tool='{tool_name}'")
-            return error_message
+        denied_message = self._check_tool_permission(tool_name, user_role)
+        if denied_message:
+            return denied_message
 
         # Permission granted - call MCP tool
-        logger.info(f"Permission granted: role='{user_role or 'guest'}', tool='{tool_name}'")
         mcp_response = self._call_mcp_tool(tool_name, arguments)
 
         # Format and return response
         return self._format_response(mcp_response, tool_name)
 
+    async def aprocess_message(self, user_message: str, user_role: Optional[str] = None) -> str:
+        """
+        Async version of process_message (non-blocking LLM parse and MCP call)
+
+        Args:
+            user_message: User's natural language request
+            user_role: User's role name for RBAC permission checking
+
+        Returns:
+            Formatted response or permission denied error
+        """
+        logger.info("MCPAgent processing message (async): {:.100}...", user_message)
+        logger.info(f"User role: {user_role or 'guest'}")
+
+        tool_call = await self._aparse_tool_call(user_message)
+
+        if tool_call is None:
+            logger.warning("Could not parse user request into MCP tool call")
+            return UNPARSED_REQUEST_MESSAGE
+
+        tool_name = tool_call.get("tool_name")
+        arguments = tool_call.get("arguments", {})
+
+        logger.info(f"Parsed tool call: {tool_name} with {arguments}")
+
+        denied_message = self._check_tool_permission(tool_name, user_role)
+        if denied_message:
+            return denied_message
+
+        mcp_response = await self._acall_mcp_tool(tool_name, arguments)
+
+        return self._format_response(mcp_response, tool_name)
+
     def answer_question(self, question: str, user_role: Optional[str] = None) -> str:
         """
         Alias for process_message (for compatibility with agent registry)
@@ -403,3 +1117,7 @@ null
             Formatted response or permission denied error
         """
         return self.process_message(question, user_role=user_role)
+
+    async def answer_question_async(self, question: str, user_role: Optional[str] = None) -> str:
+        """Async alias for aprocess_message (used by agent registry tools)"""
+        return await self.aprocess_message(question, user_role=user_role)
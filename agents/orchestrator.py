@@ -1,17 +1,190 @@
-from pathlib import Path
-from typing import List, Optional, Dict, Any
-from agents.base import BaseAgent
-from langgraph.prebuilt import create_react_agent
-from langchain_core.tools import tool
-from langchain_core.messages import HumanMessage, SystemMessage, trim_messages
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterator, List, Optional, Dict, Any
+from agents.base import BaseAgent, load_prompt, PROMPTS_DIR
+from langchain_core.messages import BaseMessage, HumanMessage, trim_messages
 from core.config import settings
 from core.memory import memory_manager
-from core.agent_registry import agent_registry
+from core.agent_registry import agent_registry, set_current_user_role
+from core.rbac import rbac_manager
 from loguru import logger
 
+PROMPT_PATH = PROMPTS_DIR / "orchestrator.md"
+
 # Maximum number of messages to keep in history (prevents token overflow)
 MAX_HISTORY_MESSAGES = 20
 
+# Tool results kept verbatim in history (most recent); older ones from previous
+# turns are replaced with a short preview - RAG results are multi-KB
+RECENT_TOOL_RESULTS = 2
+TOOL_RESULT_PREVIEW_CHARS = 200
+
+# Per-message token overhead of the chat format (role, separators)
+MESSAGE_TOKEN_OVERHEAD = 4
+
+# Token estimate when tiktoken encodings can't be loaded (Cyrillic averages ~3 chars/token)
+CHARS_PER_TOKEN_ESTIMATE = 3
+
+# Delimiters of the user context block injected into the system prompt
+USER_CONTEXT_HEADER = "=== КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ ==="
+USER_CONTEXT_FOOTER = "=== КОНЕЦ КОНТЕКСТА ==="
+RESTRICTIONS_HEADER = "=== ОГРАНИЧЕНИЯ ДОСТУПА ==="
+RESTRICTIONS_FOOTER = "=== КОНЕЦ ОГРАНИЧЕНИЙ ==="
+
+# Reply when the agent run fails
+PROCESSING_ERROR_MESSAGE = (
+    "Произошла ошибка при обработке вашего запроса. "
+    "Пожалуйста, попробуйте переформулировать вопрос."
+)
+
+# config["configurable"] key carrying the per-request system prompt (base prompt + user context).
+# LangGraph copies primitive configurable values into checkpoint metadata except "__"-prefixed
+# keys, so the prefix keeps user context (email, name) out of stored checkpoints
+SYSTEM_PROMPT_CONFIG_KEY = "__system_prompt"
+# ... and its token count, computed once per request rather than on every ReAct step
+# ("__"-prefixed for the same reason - kept out of checkpoint metadata)
+SYSTEM_PROMPT_TOKENS_CONFIG_KEY = "__system_prompt_tokens"
+
+# Compiled ReAct graphs shared by all orchestrator instances with the same wiring.
+# Key: (id(llm), tool names, system prompt, id(checkpointer)) - the graph holds
+# references to llm and checkpointer, so their ids stay valid while cached.
+# LRU-bounded: each graph keeps its checkpointer (and its conversations) alive
+MAX_COMPILED_AGENTS = 4
+_compiled_agents: OrderedDict[tuple, Any] = OrderedDict()
+_compiled_agents_lock = threading.Lock()
+
+
+@lru_cache(maxsize=16)
+def _soft_restrictions_block(role_name: Optional[str]) -> str:
+    """
+    Build the soft restrictions block for a role (cached - permissions are loaded once)
+
+    Args:
+        role_name: User's role name
+
+    Returns:
+        Block appended after the user context, or empty string if role has no restrictions
+    """
+    soft_restrictions = rbac_manager.get_soft_restrictions(role_name)
+    if not soft_restrictions:
+        return ""
+    return f"\n\n{RESTRICTIONS_HEADER}\n{soft_restrictions}\n{RESTRICTIONS_FOOTER}"
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """
+    Get tiktoken encoding for the orchestrator model (loaded once per process)
+
+    Returns:
+        tiktoken Encoding, or None if it can't be loaded (e.g. no network to fetch BPE files)
+    """
+    try:
+        import tiktoken
+
+        try:
+            return tiktoken.encoding_for_model(settings.orchestrator_model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, estimating tokens by length: {e}")
+        return None
+
+
+def _count_text_tokens(text: str) -> int:
+    """Count tokens in text (length-based estimate if tiktoken is unavailable)"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN_ESTIMATE + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _count_message_tokens(message: BaseMessage) -> int:
+    """Count tokens of one message: content, tool call arguments and format overhead"""
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    tokens = _count_text_tokens(content) + MESSAGE_TOKEN_OVERHEAD
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        tokens += _count_text_tokens(str(tool_calls))
+    return tokens
+
+
+def _compact_tool_results(messages: List[BaseMessage]) -> List[BaseMessage]:
+    """
+    Replace payloads of old tool results with a short preview
+
+    Results of the current turn (after the last human message) and the
+    RECENT_TOOL_RESULTS most recent ones from previous turns are kept verbatim. The graph state is
+    not modified - compacted messages are copies.
+
+    Args:
+        messages: Conversation history from graph state
+
+    Returns:
+        History with old tool results compacted (the input list itself if nothing changed)
+    """
+    last_human = max((i for i, m in enumerate(messages) if m.type == "human"), default=0)
+    tool_indexes = [i for i, m in enumerate(messages[:last_human]) if m.type == "tool"]
+    stale = tool_indexes[:-RECENT_TOOL_RESULTS] if RECENT_TOOL_RESULTS else tool_indexes
+
+    compacted = None
+    for i in stale:
+        content = messages[i].content
+        if not isinstance(content, str) or len(content) <= TOOL_RESULT_PREVIEW_CHARS:
+            continue
+        if compacted is None:
+            compacted = list(messages)
+        preview = f"[Ранее полученный результат ({len(content)} символов): {content[:TOOL_RESULT_PREVIEW_CHARS]}...]"
+        compacted[i] = messages[i].model_copy(update={"content": preview})
+
+    return messages if compacted is None else compacted
+
+
+def _trim_history(messages: List[BaseMessage], token_budget: int) -> List[BaseMessage]:
+    """
+    Trim conversation history to the last MAX_HISTORY_MESSAGES messages and token_budget tokens
+
+    Oldest messages are dropped first; the result always starts on a human message.
+    If the latest turn alone exceeds the budget it is kept anyway - the LLM must see the question.
+
+    Args:
+        messages: Conversation history from graph state
+        token_budget: Max tokens for the history
+
+    Returns:
+        Trimmed history (the input list itself if nothing was dropped)
+    """
+    if len(messages) > MAX_HISTORY_MESSAGES:
+        messages = trim_messages(
+            messages,
+            max_tokens=MAX_HISTORY_MESSAGES,
+            strategy="last",
+            token_counter=len,  # Count messages, not tokens
+            start_on="human",  # Start from human message
+            include_system=True,
+            allow_partial=False,
+        )
+
+    # trim_messages calls the counter on many sublists - count each message once
+    counts = {id(message): _count_message_tokens(message) for message in messages}
+    if sum(counts.values()) <= token_budget:
+        return messages
+
+    trimmed = trim_messages(
+        messages,
+        max_tokens=token_budget,
+        strategy="last",
+        token_counter=lambda msgs: sum(counts.get(id(m)) or _count_message_tokens(m) for m in msgs),
+        start_on="human",
+        include_system=True,
+        allow_partial=False,
+    )
+    if not trimmed:
+        last_human = max((i for i, m in enumerate(messages) if m.type == "human"), default=0)
+        trimmed = messages[last_human:]
+    return trimmed
+
 
 class OrchestratorAgent(BaseAgent):
     """Main orchestrator agent that handles user queries with routing to specialized agents"""
@@ -35,21 +208,20 @@ class OrchestratorAgent(BaseAgent):
         # Setup tools from registered agents
         self.tools = self._setup_tools()
 
-        # Setup agent with LangGraph create_react_agent
-        self.agent = self._setup_agent()
-
-        # Get checkpointer from memory manager
+        # Get checkpointer from memory manager (shared by all graphs of this instance)
         self.checkpointer = memory_manager.get_checkpointer()
 
+        # Setup agent with LangGraph create_react_agent
+        self.agent = self._setup_agent(self.checkpointer)
+
         logger.info(f"OrchestratorAgent initialized with RAG tool and memory={'enabled' if self.checkpointer else 'disabled'}")
 
     def _get_default_prompt(self) -> str:
         """Load system prompt from prompts/orchestrator.md"""
-        prompt_path = Path(__file__).parent.parent / "prompts" / "orchestrator.md"
+        prompt_path = PROMPT_PATH
 
         try:
-            with open(prompt_path, "r", encoding="utf-8") as f:
-                prompt = f.read()
+            prompt = load_prompt(str(prompt_path))
             logger.debug(f"Loaded prompt from {prompt_path}")
             return prompt
         except FileNotFoundError:
@@ -63,19 +235,72 @@ class OrchestratorAgent(BaseAgent):
         logger.info(f"Setup {len(tools)} tools for orchestrator from AgentRegistry")
         return tools
 
-    def _setup_agent(self):
-        """Setup LangGraph ReAct agent with checkpointer"""
-        # Get checkpointer from memory manager
-        checkpointer = memory_manager.get_checkpointer()
-
-        # Create ReAct agent with LangGraph 1.0
-        # Note: 'prompt' replaces 'state_modifier' in LangGraph 1.0
-        agent = create_react_agent(
-            model=self.llm,
-            tools=self.tools,
-            prompt=self.system_prompt,  # System prompt for the agent (LangGraph 1.0 API)
-            checkpointer=checkpointer  # Enable conversation memory
-        )
+    def _setup_agent(self, checkpointer):
+        """
+        Setup LangGraph ReAct agent with checkpointer
+
+        Args:
+            checkpointer: Conversation memory checkpointer (None if memory disabled)
+        """
+        key = (id(self.llm), tuple(t.name for t in self.tools), self.system_prompt, id(checkpointer))
+
+        with _compiled_agents_lock:
+            agent = _compiled_agents.get(key)
+            if agent is not None:
+                _compiled_agents.move_to_end(key)
+                logger.debug("Reusing compiled ReAct agent")
+                return agent
+
+            # Imported here: langgraph.prebuilt is a heavy import chain that
+            # workers never instantiating the orchestrator shouldn't pay for
+            from langgraph.prebuilt import create_react_agent
+
+            default_system_prompt = self.system_prompt
+            default_system_prompt_tokens = _count_text_tokens(default_system_prompt)
+
+            # Prompt function that:
+            # 1. Compacts old tool results and trims history to prevent token overflow
+            # 2. Adds system prompt (with user context) passed per request via config
+            # The system prompt is neither part of graph state nor checkpoint metadata
+            # ("__"-prefixed config key), so it isn't persisted and the graph is built only once.
+            def prompt_fn(state, config):
+                """Prepare messages for LLM: trim history + add system prompt"""
+                configurable = config.get("configurable", {})
+                system_prompt = configurable.get(SYSTEM_PROMPT_CONFIG_KEY)
+                if system_prompt is None:
+                    system_prompt, system_prompt_tokens = default_system_prompt, default_system_prompt_tokens
+                else:
+                    system_prompt_tokens = configurable.get(SYSTEM_PROMPT_TOKENS_CONFIG_KEY)
+                    if system_prompt_tokens is None:
+                        system_prompt_tokens = _count_text_tokens(system_prompt)
+                messages = state.get("messages", [])
+
+                # Trim history to fit message count and token budget (system prompt included)
+                token_budget = settings.orchestrator_context_budget - system_prompt_tokens
+                trimmed = _trim_history(_compact_tool_results(messages), token_budget)
+
+                # Log trimming info
+                if len(messages) > len(trimmed):
+                    logger.debug("Trimmed history: {} -> {} messages", len(messages), len(trimmed))
+
+                # Add system prompt at the beginning
+                # trimmed may be the state's own list - build a new one instead of inserting
+                prompt_messages = [{"role": "system", "content": system_prompt}]
+                prompt_messages.extend(trimmed)
+                return prompt_messages
+
+            # Create ReAct agent with LangGraph 1.0
+            # Note: 'prompt' replaces 'state_modifier' in LangGraph 1.0
+            agent = create_react_agent(
+                model=self.llm,
+                tools=self.tools,
+                prompt=prompt_fn,  # Function that trims + adds system prompt (LangGraph 1.0 API)
+                checkpointer=checkpointer,  # Enable conversation memory
+                debug=settings.agent_verbose
+            )
+            _compiled_agents[key] = agent
+            while len(_compiled_agents) > MAX_COMPILED_AGENTS:
+                _compiled_agents.popitem(last=False)
 
         logger.info(f"ReAct agent created with LangGraph and checkpointer={'enabled' if checkpointer else 'disabled'}")
         return agent
@@ -105,9 +330,7 @@ class OrchestratorAgent(BaseAgent):
         Returns:
             Agent's response
         """
-        from core.agent_registry import set_current_user_role
-
-        logger.info(f"Processing message in thread '{thread_id}': {user_message[:50]}...")
+        logger.info("Processing message in thread '{}': {:.50}...", thread_id, user_message)
 
         # Set current user role in thread-local storage for agents (RBAC)
         user_role = user_context.get('role_name') if user_context else None
@@ -115,71 +338,23 @@ class OrchestratorAgent(BaseAgent):
         logger.info(f"User role for this request: {user_role or 'guest'}")
 
         try:
-            # Prepare config with thread_id for memory persistence
-            if config is None:
-                config = {}
-
-            # Add thread_id to config if memory is enabled
-            if self.checkpointer:
-                config["configurable"] = {"thread_id": thread_id}
-
-            # Build effective system prompt with user context
-            effective_system_prompt = self.system_prompt
-
-            if user_context:
-                # Add user context to system prompt
-                context_text = self._format_user_context(user_context)
-                if context_text:  # Only add if context is not empty
-                    effective_system_prompt = f"{self.system_prompt}\n\n{context_text}"
-                    logger.info(f"Added user context to system prompt for thread '{thread_id}'")
-
-            # Create prompt function that:
-            # 1. Trims history to prevent token overflow
-            # 2. Adds system prompt with user context
-            # Note: In LangGraph 1.0, 'prompt' replaces 'state_modifier'
-            def prompt_fn(state):
-                """Prepare messages for LLM: trim history + add system prompt"""
-                messages = state.get("messages", [])
-
-                # Trim messages to last N to prevent token overflow
-                trimmed = trim_messages(
-                    messages,
-                    max_tokens=MAX_HISTORY_MESSAGES,  # Using count, not actual tokens
-                    strategy="last",
-                    token_counter=len,  # Count messages, not tokens
-                    start_on="human",  # Start from human message
-                    include_system=True,
-                    allow_partial=False,
-                )
-
-                # Log trimming info
-                if len(messages) > len(trimmed):
-                    logger.debug(f"Trimmed history: {len(messages)} -> {len(trimmed)} messages")
-
-                # Add system prompt at the beginning
-                return [{"role": "system", "content": effective_system_prompt}] + list(trimmed)
-
-            # Create temporary agent with prompt function
-            # LangGraph agents are lightweight, OK to recreate for each message
-            temp_agent = create_react_agent(
-                model=self.llm,
-                tools=self.tools,
-                prompt=prompt_fn,  # Function that trims + adds system prompt (LangGraph 1.0 API)
-                checkpointer=self.checkpointer
-            )
+            config = self._build_run_config(thread_id, config, user_context)
 
             # Run agent with user message
-            response = temp_agent.invoke(
+            response = self.agent.invoke(
                 {"messages": [HumanMessage(content=user_message)]},
                 config=config
             )
 
-            # Debug: log response structure
-            logger.debug(f"Agent response type: {type(response)}")
-            logger.debug(f"Agent response keys: {response.keys() if isinstance(response, dict) else 'N/A'}")
-            if isinstance(response, dict) and "messages" in response:
-                logger.debug(f"Messages count: {len(response['messages'])}")
-                logger.debug(f"Last message type: {type(response['messages'][-1])}")
+            # Debug: log response structure (AGENT_VERBOSE only)
+            if settings.agent_verbose:
+                logger.debug("Agent response type: {}", type(response))
+                logger.opt(lazy=True).debug(
+                    "Agent response keys: {}", lambda: list(response) if isinstance(response, dict) else 'N/A'
+                )
+                if isinstance(response, dict) and "messages" in response:
+                    logger.debug("Messages count: {}", len(response['messages']))
+                    logger.debug("Last message type: {}", type(response['messages'][-1]))
 
             # Extract output from messages
             if isinstance(response, dict) and "messages" in response:
@@ -189,39 +364,123 @@ class OrchestratorAgent(BaseAgent):
                 # Handle different message types
                 if hasattr(last_message, 'content'):
                     # AIMessage or similar object
-                    output = str(last_message.content)
-                    logger.debug(f"Extracted output from AIMessage: {output[:100]}...")
+                    output = last_message.content
+                    source = "AIMessage"
                 elif isinstance(last_message, dict):
                     # Dict message
-                    output = str(last_message.get("content", "Не удалось получить ответ."))
-                    logger.debug(f"Extracted output from dict: {output[:100]}...")
+                    output = last_message.get("content", "Не удалось получить ответ.")
+                    source = "dict"
                 else:
                     # Fallback
-                    output = str(last_message)
-                    logger.debug(f"Extracted output from fallback: {output[:100]}...")
+                    output = last_message
+                    source = "fallback"
             else:
                 # If response is not in expected format
-                output = str(response)
-                logger.debug(f"Extracted output from str(response): {output[:100]}...")
+                output = response
+                source = "str(response)"
 
-            # Ensure output is a string
+            # Ensure output is a string (content is usually str already)
             if not isinstance(output, str):
                 output = str(output)
+            logger.opt(lazy=True).debug("Extracted output from {}: {}...", lambda: source, lambda: output[:100])
 
             logger.info(f"Message processed successfully in thread '{thread_id}' - Output length: {len(output)}")
             return output
 
         except Exception as e:
             logger.error(f"Error processing message in thread '{thread_id}': {e}")
-            return (
-                "Произошла ошибка при обработке вашего запроса. "
-                "Пожалуйста, попробуйте переформулировать вопрос."
-            )
+            return PROCESSING_ERROR_MESSAGE
         finally:
             # Clear user role from thread-local storage after processing (RBAC cleanup)
             set_current_user_role(None)
             logger.debug("Cleared thread-local user role")
 
+    def stream_message(
+        self,
+        user_message: str,
+        thread_id: str = "default",
+        config: Optional[Dict[str, Any]] = None,
+        user_context: Optional[Dict[str, Any]] = None
+    ) -> Iterator[str]:
+        """
+        Process user message, yielding the answer text as the LLM generates it
+
+        Lets callers (e.g. a chat UI) show partial answers instead of waiting for
+        the full response. Only text produced by the orchestrator LLM is yielded -
+        tool calls and tool outputs are not.
+
+        Args:
+            user_message: User's input message
+            thread_id: Thread ID for conversation memory (default: "default")
+            config: Optional configuration dict for agent invocation
+            user_context: Optional user profile context (see process_message)
+
+        Yields:
+            Text deltas of the agent's response
+        """
+        logger.info("Streaming message in thread '{}': {:.50}...", thread_id, user_message)
+
+        user_role = user_context.get('role_name') if user_context else None
+        set_current_user_role(user_role)
+        logger.info(f"User role for this request: {user_role or 'guest'}")
+
+        try:
+            config = self._build_run_config(thread_id, config, user_context)
+
+            for chunk, metadata in self.agent.stream(
+                {"messages": [HumanMessage(content=user_message)]},
+                config=config,
+                stream_mode="messages"
+            ):
+                if metadata.get("langgraph_node") == "agent" and isinstance(chunk.content, str) and chunk.content:
+                    yield chunk.content
+
+        except Exception as e:
+            logger.error(f"Error streaming message in thread '{thread_id}': {e}")
+            yield PROCESSING_ERROR_MESSAGE
+        finally:
+            set_current_user_role(None)
+            logger.debug("Cleared thread-local user role")
+
+    def _build_run_config(
+        self,
+        thread_id: str,
+        config: Optional[Dict[str, Any]],
+        user_context: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Prepare graph config: thread_id for memory and system prompt with user context
+
+        Args:
+            thread_id: Thread ID for conversation memory
+            config: Optional caller configuration dict (copied, never modified)
+            user_context: Optional user profile context
+
+        Returns:
+            Config for agent invocation
+        """
+        # Prepare config with thread_id for memory persistence. Copy both levels: a caller
+        # reusing its dict must not inherit the previous user's system prompt
+        config = dict(config or {})
+        configurable = dict(config.get("configurable") or {})
+        config["configurable"] = configurable
+
+        # Add thread_id to config if memory is enabled
+        if self.checkpointer:
+            configurable["thread_id"] = thread_id
+
+        # Build effective system prompt with user context
+        if user_context:
+            # Add user context to system prompt
+            context_text = self._format_user_context(user_context)
+            if context_text:  # Only add if context is not empty
+                system_prompt = f"{self.system_prompt}\n\n{context_text}"
+                configurable[SYSTEM_PROMPT_CONFIG_KEY] = system_prompt
+                configurable[SYSTEM_PROMPT_TOKENS_CONFIG_KEY] = _count_text_tokens(system_prompt)
+                logger.info(f"Added user context to system prompt for thread '{thread_id}'")
+
+        return config
+
     def _format_user_context(self, user_context: Dict[str, Any]) -> str:
         """
         Format user context for system prompt injection
@@ -240,9 +499,7 @@ class OrchestratorAgent(BaseAgent):
         Returns:
             Formatted context string for system prompt in Russian
         """
-        from core.rbac import rbac_manager
-
-        parts = ["=== КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ ==="]
+        parts = [USER_CONTEXT_HEADER]
 
         # Add name if available
         if user_context.get('first_name') or user_context.get('last_name'):
@@ -269,14 +526,7 @@ class OrchestratorAgent(BaseAgent):
         if len(parts) == 1:
             return ""
 
-        parts.append("=== КОНЕЦ КОНТЕКСТА ===")
+        parts.append(USER_CONTEXT_FOOTER)
 
         # Add soft restrictions for LLM (NEW - RBAC soft control)
-        soft_restrictions = rbac_manager.get_soft_restrictions(role_name)
-        if soft_restrictions:
-            parts.append("")  # Empty line for spacing
-            parts.append("=== ОГРАНИЧЕНИЯ ДОСТУПА ===")
-            parts.append(soft_restrictions)
-            parts.append("=== КОНЕЦ ОГРАНИЧЕНИЙ ===")
-
-        return "\n".join(parts)
+        return "\n".join(parts) + _soft_restrictions_block(role_name)
@@ -1,12 +1,57 @@
 """RAG Agent for knowledge base search with Cohere Reranking"""
-from pathlib import Path
-from typing import List, Dict
-from agents.base import BaseAgent
+from enum import IntEnum
+from typing import List, Dict, Optional, Tuple
+from agents.base import BaseAgent, load_prompt, PROMPTS_DIR
 from core.vector_store import vector_store_manager
 from core.reranker import reranker
 from core.config import settings
 from loguru import logger
 
+PROMPT_PATH = PROMPTS_DIR / "rag_agent.md"
+
+KNOWLEDGE_BASE_UNAVAILABLE_MESSAGE = (
+    "База знаний временно недоступна. "
+    "Пожалуйста, попробуйте позже или обратитесь к администратору."
+)
+NOTHING_FOUND_MESSAGE = "Информация по вашему запросу не найдена в базе знаний."
+SEARCH_ERROR_MESSAGE = (
+    "Произошла ошибка при поиске в базе знаний. "
+    "Пожалуйста, попробуйте переформулировать запрос."
+)
+ANSWER_ERROR_MESSAGE = (
+    "Не удалось сформировать ответ. "
+    "Пожалуйста, попробуйте переформулировать вопрос."
+)
+
+# Search result block per document: number, relevance band, score, content
+RERANKED_DOCUMENT_FORMAT = "[Документ {}] (релевантность: {}, rerank: {:.3f})\n{}"
+VECTOR_DOCUMENT_FORMAT = "[Документ {}] (релевантность: {}, vector: {:.2f})\n{}"
+
+# LLM prompt for answering from knowledge base context
+ANSWER_PROMPT_TEMPLATE = """На основе следующей информации из базы знаний ответь на вопрос пользователя.
+
+ВАЖНО: Используй ТОЛЬКО информацию из предоставленного контекста. Не придумывай и не добавляй информацию извне.
+
+Контекст из базы знаний:
+{context}
+
+Вопрос пользователя: {question}
+
+Твой ответ должен:
+1. Быть основан только на информации из контекста выше
+2. Быть чётким и структурированным
+3. Если информация неполная — прямо об этом сказать
+4. Быть на русском языке
+"""
+
+
+class SearchStatus(IntEnum):
+    """Outcome of a knowledge base search"""
+    OK = 0           # Documents found, payload is the formatted context
+    EMPTY = 1        # Nothing relevant found, payload is a user-facing message
+    UNAVAILABLE = 2  # Vector store not available, payload is a user-facing message
+    ERROR = 3        # Search failed, payload is a user-facing message
+
 
 class RAGAgent(BaseAgent):
     """RAG Agent that searches knowledge base and provides factual answers"""
@@ -29,11 +74,10 @@ class RAGAgent(BaseAgent):
 
     def _get_default_prompt(self) -> str:
         """Load system prompt from prompts/rag_agent.md"""
-        prompt_path = Path(__file__).parent.parent / "prompts" / "rag_agent.md"
+        prompt_path = PROMPT_PATH
 
         try:
-            with open(prompt_path, "r", encoding="utf-8") as f:
-                prompt = f.read()
+            prompt = load_prompt(str(prompt_path))
             logger.debug(f"Loaded RAG agent prompt from {prompt_path}")
             return prompt
         except FileNotFoundError:
@@ -47,6 +91,32 @@ class RAGAgent(BaseAgent):
         """
         Search knowledge base with optional Cohere reranking
 
+        Args:
+            query: User's search query
+            k: Number of final results to return (defaults to RERANK_TOP_N or VECTOR_SEARCH_K)
+
+        Returns:
+            Formatted string with search results (or a user-facing message if nothing found)
+        """
+        return self._search(query, k)[1]
+
+    async def asearch_knowledge_base(self, query: str, k: int = None) -> str:
+        """
+        Async version of search_knowledge_base
+
+        Args:
+            query: User's search query
+            k: Number of final results to return (defaults to RERANK_TOP_N or VECTOR_SEARCH_K)
+
+        Returns:
+            Formatted string with search results (or a user-facing message if nothing found)
+        """
+        return (await self._asearch(query, k))[1]
+
+    def _search(self, query: str, k: int = None) -> Tuple[SearchStatus, str]:
+        """
+        Search knowledge base with optional Cohere reranking
+
         Pipeline:
         1. Vector search (get more candidates with lower threshold)
         2. Cohere rerank (if enabled) to select top-n most relevant
@@ -57,66 +127,121 @@ class RAGAgent(BaseAgent):
             k: Number of final results to return (defaults to RERANK_TOP_N or VECTOR_SEARCH_K)
 
         Returns:
-            Formatted string with search results
+            Tuple of (status, payload): formatted search results for SearchStatus.OK,
+            otherwise a user-facing message
         """
         if not self.vector_store.is_available():
             logger.warning("Vector store not available")
-            return (
-                "База знаний временно недоступна. "
-                "Пожалуйста, попробуйте позже или обратитесь к администратору."
-            )
+            return SearchStatus.UNAVAILABLE, KNOWLEDGE_BASE_UNAVAILABLE_MESSAGE
 
         try:
-            # Determine search parameters based on reranker availability
-            if reranker.is_available():
-                # Get more candidates for reranking (10 candidates -> top 3 after rerank)
-                search_k = 10
-                final_k = k or settings.rerank_top_n
-                logger.info(f"Reranker enabled: fetching {search_k} candidates, will return top {final_k}")
-            else:
-                # No reranker - use standard search
-                search_k = k or settings.vector_search_k
-                final_k = search_k
-                logger.info(f"Reranker disabled: fetching {search_k} documents directly")
+            use_reranker = reranker.is_available()
+            search_k, final_k = self._search_limits(k, use_reranker)
 
             # Step 1: Vector search (get candidates)
             documents = self.vector_store.search_with_score(query=query, k=search_k)
 
             if not documents:
-                return "Информация по вашему запросу не найдена в базе знаний."
+                return SearchStatus.EMPTY, NOTHING_FOUND_MESSAGE
 
             # Step 2: Rerank if available
-            if reranker.is_available() and len(documents) > 0:
-                documents = reranker.rerank(
-                    query=query,
-                    documents=documents,
-                    top_n=final_k
-                )
+            if use_reranker:
+                documents = reranker.rerank(query=query, documents=documents, top_n=final_k)
                 logger.info(f"Reranked {search_k} -> {len(documents)} documents")
             else:
                 # Limit to final_k without reranking
                 documents = documents[:final_k]
 
             # Step 3: Format results
-            result = "Найденная информация:\n\n"
-            for i, doc in enumerate(documents, 1):
-                content = doc["content"]
-                score = doc.get("score", 0)
-                relevance = doc.get("relevance", "unknown")
-                is_reranked = doc.get("reranked", False)
+            return SearchStatus.OK, self._format_documents(documents)
 
-                score_label = f"rerank: {score:.3f}" if is_reranked else f"vector: {score:.2f}"
-                result += f"[Документ {i}] (релевантность: {relevance}, {score_label})\n"
-                result += f"{content}\n\n"
+        except Exception as e:
+            logger.error(f"Error searching knowledge base: {e}")
+            return SearchStatus.ERROR, SEARCH_ERROR_MESSAGE
+
+    async def _asearch(self, query: str, k: int = None) -> Tuple[SearchStatus, str]:
+        """
+        Async version of _search - vector search and rerank don't block the event loop
+
+        Args:
+            query: User's search query
+            k: Number of final results to return (defaults to RERANK_TOP_N or VECTOR_SEARCH_K)
+
+        Returns:
+            Tuple of (status, payload), see _search
+        """
+        if not self.vector_store.is_available():
+            logger.warning("Vector store not available")
+            return SearchStatus.UNAVAILABLE, KNOWLEDGE_BASE_UNAVAILABLE_MESSAGE
+
+        try:
+            use_reranker = reranker.is_available()
+            search_k, final_k = self._search_limits(k, use_reranker)
 
-            return result.strip()
+            documents = await self.vector_store.asearch_with_score(query=query, k=search_k)
+
+            if not documents:
+                return SearchStatus.EMPTY, NOTHING_FOUND_MESSAGE
+
+            if use_reranker:
+                documents = await reranker.arerank(query=query, documents=documents, top_n=final_k)
+                logger.info(f"Reranked {search_k} -> {len(documents)} documents")
+            else:
+                documents = documents[:final_k]
+
+            return SearchStatus.OK, self._format_documents(documents)
 
         except Exception as e:
             logger.error(f"Error searching knowledge base: {e}")
-            return (
-                "Произошла ошибка при поиске в базе знаний. "
-                "Пожалуйста, попробуйте переформулировать запрос."
-            )
+            return SearchStatus.ERROR, SEARCH_ERROR_MESSAGE
+
+    def _search_limits(self, k: Optional[int], use_reranker: bool) -> Tuple[int, int]:
+        """
+        Determine search parameters based on reranker availability
+
+        Args:
+            k: Requested number of final results (None for config default)
+            use_reranker: Whether results will be reranked
+
+        Returns:
+            Tuple of (number of vector search candidates, number of final results)
+        """
+        if use_reranker:
+            # Get more candidates for reranking (10 candidates -> top 3 after rerank)
+            search_k = 10
+            final_k = k or settings.rerank_top_n
+            logger.info(f"Reranker enabled: fetching {search_k} candidates, will return top {final_k}")
+        else:
+            # No reranker - use standard search
+            search_k = k or settings.vector_search_k
+            final_k = search_k
+            logger.info(f"Reranker disabled: fetching {search_k} documents directly")
+        return search_k, final_k
+
+    def _format_documents(self, documents: List[Dict]) -> str:
+        """
+        Format search results for LLM context
+
+        Args:
+            documents: Documents from vector search / reranker
+
+        Returns:
+            Numbered document blocks with relevance labels
+        """
+        # Reranker marks either all documents or none (it returns originals on failure)
+        is_reranked = bool(documents) and documents[0].get("reranked", False)
+        format_document = (RERANKED_DOCUMENT_FORMAT if is_reranked else VECTOR_DOCUMENT_FORMAT).format
+
+        parts = ["Найденная информация:"]
+        parts.extend(
+            format_document(i, doc.get("relevance", "unknown"), doc.get("score", 0), doc["content"])
+            for i, doc in enumerate(documents, 1)
+        )
+        return "\n\n".join(parts).strip()
+
+    def _build_answer_prompt(self, question: str, context: str) -> str:
+        """Construct LLM prompt from knowledge base context and user question"""
+        return ANSWER_PROMPT_TEMPLATE.format(context=context, question=question)
 
     def answer_question(self, question: str) -> str:
         """
@@ -131,43 +256,51 @@ class RAGAgent(BaseAgent):
         logger.info(f"📚 RAG AGENT: processing question: '{question}'")
 
         # Search knowledge base
-        context = self.search_knowledge_base(question)
+        status, context = self._search(question)
         logger.info(f"📚 RAG AGENT: got context ({len(context)} chars)")
 
         # If no relevant documents found, return early
-        if "не найдена" in context or "недоступна" in context or "ошибка" in context.lower():
-            logger.warning(f"📚 RAG AGENT: no relevant docs found, returning early")
+        if status is not SearchStatus.OK:
+            logger.warning(f"📚 RAG AGENT: no relevant docs found ({status.name}), returning early")
             return context
 
-        # Construct prompt with context
-        prompt_with_context = f"""На основе следующей информации из базы знаний ответь на вопрос пользователя.
+        # Get answer from LLM
+        try:
+            response = self.invoke(self._build_answer_prompt(question, context))
+            logger.info("RAG Agent successfully generated answer")
+            return response
 
-ВАЖНО: Используй ТОЛЬКО информацию из предоставленного контекста. Не придумывай и не добавляй информацию извне.
+        except Exception as e:
+            logger.error(f"Error generating answer: {e}")
+            return ANSWER_ERROR_MESSAGE
 
-Контекст из базы знаний:
-{context}
+    async def answer_question_async(self, question: str) -> str:
+        """
+        Async version of answer_question (used by the orchestrator tool via ainvoke)
 
-Вопрос пользователя: {question}
+        Args:
+            question: User's question
 
-Твой ответ должен:
-1. Быть основан только на информации из контекста выше
-2. Быть чётким и структурированным
-3. Если информация неполная — прямо об этом сказать
-4. Быть на русском языке
-"""
+        Returns:
+            Answer based on knowledge base
+        """
+        logger.info(f"📚 RAG AGENT (async): processing question: '{question}'")
+
+        status, context = await self._asearch(question)
+        logger.info(f"📚 RAG AGENT: got context ({len(context)} chars)")
+
+        if status is not SearchStatus.OK:
+            logger.warning(f"📚 RAG AGENT: no relevant docs found ({status.name}), returning early")
+            return context
 
-        # Get answer from LLM
         try:
-            response = self.invoke(prompt_with_context)
+            response = await self.ainvoke(self._build_answer_prompt(question, context))
             logger.info("RAG Agent successfully generated answer")
             return response
 
         except Exception as e:
             logger.error(f"Error generating answer: {e}")
-            return (
-                "Не удалось сформировать ответ. "
-                "Пожалуйста, попробуйте переформулировать вопрос."
-            )
+            return ANSWER_ERROR_MESSAGE
 
     def process_message(self, user_message: str) -> str:
         """
@@ -5,12 +5,105 @@ Generates safe, schema-aware SQL queries for all entities with RBAC filtering.
 Supports auto-JOIN generation, parameter escaping, and SQL injection protection.
 """
 
-from typing import Dict, List, Tuple, Optional, Any
+import re
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Tuple, Optional, Any
 from loguru import logger
 
+from core.config import settings
 # Import models from shared module to avoid circular import
 from agents.analytics_models import AnalyticsQuery, FilterOptions
 
+# Supported date_range presets -> PostgreSQL interval
+DATE_RANGE_INTERVALS = {
+    'last_week': '7 days',
+    'last_month': '30 days',
+    'last_year': '365 days',
+}
+
+# Pre-aggregated default chart counts (database/sql/analytics_chart_mviews.sql)
+CHART_MVIEWS = {
+    'projects': 'mv_projects_status_counts',
+    'stages': 'mv_stages_project_counts',
+    'objects': 'mv_objects_responsible_counts',
+}
+
+# Roles without RBAC row filtering - may read pre-aggregated views
+UNRESTRICTED_ROLES = ('manager', 'admin')
+
+# Ranking ORDER BY directions (anything else sorts descending) and the largest TOP N served
+ORDER_DIRECTIONS = {'asc': 'ASC', 'desc': 'DESC'}
+MAX_RANKING_LIMIT = 100
+
+
+# %(name)s parameter placeholders in generated SQL
+PLACEHOLDER_PATTERN = re.compile(r"%\(([A-Za-z_][A-Za-z0-9_]*)\)s")
+
+
+def _sql_literal(value: Any) -> Optional[str]:
+    """Render a parameter value as an escaped SQL literal (None for unsupported types)"""
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, str):
+        # Escape single quotes (SQL standard: ' becomes '')
+        return "'{}'".format(value.replace("'", "''"))
+    if isinstance(value, (int, float)):
+        return str(value)
+    if value is None:
+        return "NULL"
+    if isinstance(value, (list, tuple)):
+        # Array parameter for = ANY(...): an untyped '{"a","b"}' literal, so Postgres coerces it
+        # to the column's array type (enum/uuid columns reject ARRAY['a', 'b'], which is text[])
+        elements = ','.join(
+            '"{}"'.format(str(item).replace('\\', '\\\\').replace('"', '\\"')) for item in value
+        )
+        return "'{{{}}}'".format(elements.replace("'", "''"))
+    return None
+
+
+def _where_lines(predicates: List[str]) -> Tuple[str, ...]:
+    """WHERE clause lines for the given predicates (one per line), or nothing without predicates"""
+    if not predicates:
+        return ()
+    return ("WHERE " + "\nAND ".join(predicates),)
+
+
+def _freeze_schema(schema: Dict[str, Dict]) -> Mapping[str, Mapping]:
+    """
+    Make SCHEMA read-only so cached lookups derived from it cannot go stale
+
+    Column lists become tuples, relations and entity dicts become read-only mappings.
+    """
+    frozen = {}
+    for entity, entity_schema in schema.items():
+        entity_schema = dict(entity_schema)
+        entity_schema['columns'] = tuple(entity_schema['columns'])
+        entity_schema['relations'] = MappingProxyType(dict(entity_schema.get('relations', {})))
+        frozen[entity] = MappingProxyType(entity_schema)
+    return MappingProxyType(frozen)
+
+
+def _build_relation_index(schema: Mapping[str, Mapping]) -> Dict[str, Dict[str, Tuple[str, str, str]]]:
+    """
+    Index SCHEMA relations by (entity, related entity) for JOIN condition lookup
+
+    Forward relations (declared on the entity itself) take precedence over
+    reverse ones (declared on the related entity); within each direction the
+    first declared relation wins.
+
+    Returns:
+        {entity: {related_entity: (direction, fk, pk)}}, direction is 'forward' or 'reverse'
+    """
+    index: Dict[str, Dict[str, Tuple[str, str, str]]] = {}
+    for entity, entity_schema in schema.items():
+        for rel_table, fk, pk in entity_schema.get('relations', {}).values():
+            index.setdefault(entity, {}).setdefault(rel_table, ('forward', fk, pk))
+    for entity, entity_schema in schema.items():
+        for rel_table, fk, pk in entity_schema.get('relations', {}).values():
+            index.setdefault(rel_table, {}).setdefault(entity, ('reverse', fk, pk))
+    return index
+
 
 class SQLGenerator:
     """Universal SQL generator with schema awareness and RBAC support"""
@@ -170,146 +263,252 @@ class SQLGenerator:
             'value_column': 'task_id'
         }
     }
+    SCHEMA = _freeze_schema(SCHEMA)
 
-    def _get_column_name(self, entity: str, logical_name: str) -> str:
-        """
-        Get actual column name from schema based on logical name
+    # Fallback schemas for unknown entities and unknown ranking group entities
+    DEFAULT_SCHEMA = SCHEMA['projects']
+    DEFAULT_GROUP_SCHEMA = SCHEMA['profiles']
 
-        Args:
-            entity: Entity name (projects, stages, objects, etc.)
-            logical_name: Logical column name (status, created_at, updated_at, id, name)
+    # Logical -> actual column names per entity (entities listed here use only this map)
+    COLUMN_MAPS = {
+        # Known mapping for projects table (confirmed by user's data)
+        'projects': {
+            'id': 'project_id',
+            'name': 'project_name',
+            'status': 'project_status',
+            'description': 'project_description',
+            'created_at': 'project_created',
+            'updated_at': 'project_updated',
+            'manager': 'project_manager',
+            'lead_engineer': 'project_lead_engineer'
+        },
+        # Known mapping for stages table (prefixed)
+        'stages': {
+            'id': 'stage_id',
+            'name': 'stage_name',
+            'description': 'stage_description',
+            'project_id': 'stage_project_id',
+            'created_at': 'stage_created',
+            'updated_at': 'stage_updated'
+        },
+        # Known mapping for sections table (prefixed)
+        'sections': {
+            'id': 'section_id',
+            'name': 'section_name',
+            'description': 'section_description',
+            'responsible': 'section_responsible',
+            'responsible_id': 'section_responsible',
+            'object_id': 'section_object_id',
+            'project_id': 'section_project_id',
+            'status_id': 'section_status_id',
+            'start_date': 'section_start_date',
+            'end_date': 'section_end_date',
+            'created_at': 'section_created',
+            'updated_at': 'section_updated'
+        },
+        # Known mapping for tasks table (prefixed)
+        'tasks': {
+            'id': 'task_id',
+            'name': 'task_name',
+            'description': 'task_description',
+            'responsible': 'task_responsible',
+            'responsible_id': 'task_responsible',
+            'section_id': 'task_parent_section',
+            'status': 'task_status',
+            'start_date': 'task_start_date',
+            'end_date': 'task_end_date',
+            'created_at': 'task_created',
+            'updated_at': 'task_updated'
+        },
+        # Known mapping for objects table (prefixed like projects)
+        'objects': {
+            'id': 'object_id',
+            'name': 'object_name',
+            'description': 'object_description',
+            'responsible': 'object_responsible',
+            'responsible_id': 'object_responsible',
+            'stage_id': 'object_stage_id',
+            'project_id': 'object_project_id',
+            'start_date': 'object_start_date',
+            'end_date': 'object_end_date',
+            'created_at': 'object_created',
+            'updated_at': 'object_updated'
+        },
+        # Special mapping for view_employee_workloads
+        'view_employee_workloads': {
+            'created_at': 'loading_start',  # Use loading_start for sorting
+            'status': 'loading_rate',  # No status, use loading_rate instead
+            'id': 'user_id',
+            'name': 'full_name'
+        },
+        # Special mapping for v_budgets_full
+        'v_budgets_full': {
+            'created_at': 'budget_id',  # No created_at, use budget_id for sorting
+            'status': 'entity_type',  # No status, use entity_type
+            'id': 'budget_id',
+            'name': 'entity_id'
+        },
+        # Special mapping for view_project_dashboard
+        'view_project_dashboard': {
+            'created_at': 'project_id',  # No created_at
+            'status': 'project_id',  # No status
+            'id': 'project_id',
+            'name': 'project_id'
+        }
+    }
+    COLUMN_MAPS = MappingProxyType({entity: MappingProxyType(mapping) for entity, mapping in COLUMN_MAPS.items()})
+
+    # Column name sets for membership tests (SCHEMA lists keep column order)
+    COLUMN_SETS = {entity: frozenset(schema['columns']) for entity, schema in SCHEMA.items()}
+
+    # Tables whose columns carry a singular entity prefix (projects -> project_status);
+    # views and other tables use plain column names
+    ENTITY_SINGULAR = {
+        'projects': 'project',
+        'stages': 'stage',
+        'objects': 'object',
+        'sections': 'section',
+        'tasks': 'task',
+    }
 
-        Returns:
-            Actual column name from schema
-        """
-        schema = self.SCHEMA.get(entity, self.SCHEMA['projects'])
+    # Declared relations indexed by (entity, related entity)
+    RELATION_INDEX = _build_relation_index(SCHEMA)
 
-        # Known mapping for projects table (confirmed by user's data)
-        if entity == 'projects':
-            mapping = {
-                'id': 'project_id',
-                'name': 'project_name',
-                'status': 'project_status',
-                'description': 'project_description',
-                'created_at': 'project_created',
-                'updated_at': 'project_updated',
-                'manager': 'project_manager',
-                'lead_engineer': 'project_lead_engineer'
-            }
-            return mapping.get(logical_name, logical_name)
+    # Entity -> first "*responsible*" column, used to join profiles without a declared relation
+    RESPONSIBLE_COLUMNS = {
+        entity: next((col for col in schema['columns'] if 'responsible' in col.lower()), None)
+        for entity, schema in SCHEMA.items()
+    }
 
-        # Known mapping for stages table (prefixed)
-        if entity == 'stages':
-            mapping = {
-                'id': 'stage_id',
-                'name': 'stage_name',
-                'description': 'stage_description',
-                'project_id': 'stage_project_id',
-                'created_at': 'stage_created',
-                'updated_at': 'stage_updated'
-            }
-            return mapping.get(logical_name, logical_name)
+    # v_budgets_full.entity_type for entities that have budgets
+    BUDGET_ENTITY_TYPES = {'projects': 'project', 'stages': 'stage', 'objects': 'object'}
+
+    # Complex join columns taken from a joined profiles / v_budgets_full row
+    PROFILE_COLUMNS = frozenset({'first_name', 'last_name', 'email'})
+    BUDGET_COLUMNS = frozenset({'total_amount', 'spent', 'remaining', 'total_spent', 'remaining_amount'})
+    BUDGET_COLUMN_NAMES = {'spent': 'total_spent', 'remaining': 'remaining_amount'}
+
+    # Entities with a progress column (progress filters, radialBar charts without a progress metric)
+    PROGRESS_ENTITIES = frozenset({'objects', 'stages', 'sections', 'decomposition_items'})
+    RADIALBAR_ENTITIES = frozenset({'stages', 'objects', 'sections'})
+
+    # Numeric range filters on joined entities: (entity that must be in the query, column, min field, max field)
+    RELATED_RANGE_FILTERS = (
+        ('v_budgets_full', 'b.total_amount', 'min_budget', 'max_budget'),
+        ('view_project_dashboard', 'pd.hours_actual_total', 'min_hours', 'max_hours'),
+    )
+
+    # Ranking order_by -> (aggregate SELECT columns, ORDER BY column, HAVING over v_budgets_full or None);
+    # {alias} is the primary entity alias, unknown metrics rank by count
+    RANKING_METRICS = {
+        'count': (("COUNT({alias}.*) as count",), 'count', None),
+        'total_amount': (("SUM(b.total_amount) as total_budget",), 'total_budget', None),
+        'budget': (("SUM(b.total_amount) as total_budget",), 'total_budget', None),
+        # For overrun/overspent queries, calculate (spent - budget) as overrun and keep only overruns
+        'spent': (
+            (
+                "SUM(b.total_spent - b.total_amount) as overrun",
+                "SUM(b.total_spent) as total_spent",
+                "SUM(b.total_amount) as total_budget",
+            ),
+            'overrun',
+            "HAVING SUM(b.total_spent - b.total_amount) > 0",
+        ),
+        'hours': (("SUM(pd.hours_actual_total) as total_hours",), 'total_hours', None),
+    }
+    RANKING_METRICS['total_spent'] = RANKING_METRICS['spent']
+
+    # "My ..." personalization predicates; {alias} and {manager_col} are filled in per entity
+    PERSONALIZATION_TEMPLATES = {
+        'projects': "{alias}.{manager_col} = %(user_id)s",
+        'objects': "{alias}.object_responsible = %(user_id)s",
+        'sections': "{alias}.section_responsible = %(user_id)s",
+        'tasks': "{alias}.task_responsible = %(user_id)s",
+        # Stages via objects where user is responsible
+        'stages': """EXISTS (
+                SELECT 1 FROM objects o
+                WHERE o.stage_id = {alias}.id
+                AND o.responsible_id = %(user_id)s
+            )""",
+        # Decomposition items via section responsible
+        'decomposition_items': """EXISTS (
+                SELECT 1 FROM sections s
+                WHERE s.section_id = {alias}.decomposition_item_section_id
+                AND s.section_responsible = %(user_id)s
+            )""",
+    }
 
-        # Known mapping for sections table (prefixed)
-        if entity == 'sections':
-            mapping = {
-                'id': 'section_id',
-                'name': 'section_name',
-                'description': 'section_description',
-                'responsible': 'section_responsible',
-                'responsible_id': 'section_responsible',
-                'object_id': 'section_object_id',
-                'project_id': 'section_project_id',
-                'status_id': 'section_status_id',
-                'start_date': 'section_start_date',
-                'end_date': 'section_end_date',
-                'created_at': 'section_created',
-                'updated_at': 'section_updated'
-            }
-            return mapping.get(logical_name, logical_name)
+    # Intent -> generator method name (anything else gets generate_generic_sql)
+    INTENT_GENERATORS = {
+        'complex_join': 'generate_complex_join_sql',
+        'chart': 'generate_chart_sql',
+        'report': 'generate_report_sql',
+        'statistics': 'generate_statistics_sql',
+        'comparison': 'generate_comparison_sql',
+        'ranking': 'generate_ranking_sql',
+    }
 
-        # Known mapping for tasks table (prefixed)
-        if entity == 'tasks':
-            mapping = {
-                'id': 'task_id',
-                'name': 'task_name',
-                'description': 'task_description',
-                'responsible': 'task_responsible',
-                'responsible_id': 'task_responsible',
-                'section_id': 'task_parent_section',
-                'status': 'task_status',
-                'start_date': 'task_start_date',
-                'end_date': 'task_end_date',
-                'created_at': 'task_created',
-                'updated_at': 'task_updated'
-            }
-            return mapping.get(logical_name, logical_name)
+    # Chart kind -> SELECT columns/tail builder (anything else gets _default_chart_columns)
+    CHART_SKELETON_BUILDERS = {
+        'radialBar': '_radialbar_chart_columns',
+        'radar': '_radar_chart_columns',
+    }
 
-        # Known mapping for objects table (prefixed like projects)
-        if entity == 'objects':
-            mapping = {
-                'id': 'object_id',
-                'name': 'object_name',
-                'description': 'object_description',
-                'responsible': 'object_responsible',
-                'responsible_id': 'object_responsible',
-                'stage_id': 'object_stage_id',
-                'project_id': 'object_project_id',
-                'start_date': 'object_start_date',
-                'end_date': 'object_end_date',
-                'created_at': 'object_created',
-                'updated_at': 'object_updated'
-            }
-            return mapping.get(logical_name, logical_name)
+    # UUID/ID columns never shown in reports
+    REPORT_SKIP_SUFFIXES = ('_id', '_responsible', '_manager')
+    REPORT_SKIP_EXACT = frozenset({'id', 'responsible', 'manager'})
 
-        # Special mapping for view_employee_workloads
-        if entity == 'view_employee_workloads':
-            mapping = {
-                'created_at': 'loading_start',  # Use loading_start for sorting
-                'status': 'loading_rate',  # No status, use loading_rate instead
-                'id': 'user_id',
-                'name': 'full_name'
-            }
-            return mapping.get(logical_name, logical_name)
+    @classmethod
+    @lru_cache(maxsize=512)
+    def _get_column_name(cls, entity: str, logical_name: str) -> str:
+        """
+        Get actual column name from schema based on logical name (cached - pure lookup)
 
-        # Special mapping for v_budgets_full
-        if entity == 'v_budgets_full':
-            mapping = {
-                'created_at': 'budget_id',  # No created_at, use budget_id for sorting
-                'status': 'entity_type',  # No status, use entity_type
-                'id': 'budget_id',
-                'name': 'entity_id'
-            }
-            return mapping.get(logical_name, logical_name)
+        Args:
+            entity: Entity name (projects, stages, objects, etc.)
+            logical_name: Logical column name (status, created_at, updated_at, id, name)
 
-        # Special mapping for view_project_dashboard
-        if entity == 'view_project_dashboard':
-            mapping = {
-                'created_at': 'project_id',  # No created_at
-                'status': 'project_id',  # No status
-                'id': 'project_id',
-                'name': 'project_id'
-            }
+        Returns:
+            Actual column name from schema
+        """
+        mapping = cls.COLUMN_MAPS.get(entity)
+        if mapping is not None:
             return mapping.get(logical_name, logical_name)
 
         # For other tables, check what's in SCHEMA columns list
-        columns = schema.get('columns', [])
+        columns = cls.COLUMN_SETS.get(entity, cls.COLUMN_SETS['projects'])
 
         # Strategy 1: Direct match (e.g., 'status' exists in columns)
         if logical_name in columns:
             return logical_name
 
         # Strategy 2: Try prefixed version (e.g., 'status' -> 'stage_status')
-        # This handles if other tables also use prefixes like projects
-        entity_singular = entity.rstrip('s')  # projects->project, stages->stage
-        prefixed = f"{entity_singular}_{logical_name}"
-        if prefixed in columns:
-            return prefixed
+        # Unknown entities (projects columns) still guess the prefix from the name
+        entity_singular = cls.ENTITY_SINGULAR.get(entity) if entity in cls.SCHEMA else entity.rstrip('s')
+        if entity_singular:
+            prefixed = f"{entity_singular}_{logical_name}"
+            if prefixed in columns:
+                return prefixed
 
         # Strategy 3: Fallback to original logical name
         # If SQL fails, error will guide us to fix SCHEMA
         return logical_name
 
+    @classmethod
+    @lru_cache(maxsize=64)
+    def _entity_meta(cls, entity: str) -> Tuple[str, str, str, str]:
+        """
+        Get the schema values every generator starts from (unknown entities use the projects schema)
+
+        Args:
+            entity: Entity name
+
+        Returns:
+            Tuple of (alias, table, group_by_column, name column)
+        """
+        schema = cls.SCHEMA.get(entity, cls.DEFAULT_SCHEMA)
+        return schema['alias'], schema['table'], schema['group_by_column'], cls._get_column_name(entity, 'name')
+
     def generate_sql(
         self,
         parsed_query: AnalyticsQuery,
@@ -327,22 +526,10 @@ class SQLGenerator:
         Returns:
             Tuple of (sql_string, parameters_dict)
         """
-        logger.info(f"Generating SQL for intent='{parsed_query.intent}', entities={parsed_query.entities}")
-
-        if parsed_query.intent == "complex_join":
-            return self.generate_complex_join_sql(parsed_query, user_role, user_id)
-        elif parsed_query.intent == "chart":
-            return self.generate_chart_sql(parsed_query, user_role, user_id)
-        elif parsed_query.intent == "report":
-            return self.generate_report_sql(parsed_query, user_role, user_id)
-        elif parsed_query.intent == "statistics":
-            return self.generate_statistics_sql(parsed_query, user_role, user_id)
-        elif parsed_query.intent == "comparison":
-            return self.generate_comparison_sql(parsed_query, user_role, user_id)
-        elif parsed_query.intent == "ranking":
-            return self.generate_ranking_sql(parsed_query, user_role, user_id)
-        else:
-            return self.generate_generic_sql(parsed_query, user_role, user_id)
+        logger.info("Generating SQL for intent='{}', entities={}", parsed_query.intent, parsed_query.entities)
+
+        generator = getattr(self, self.INTENT_GENERATORS.get(parsed_query.intent, 'generate_generic_sql'))
+        return generator(parsed_query, user_role, user_id)
 
     def generate_complex_join_sql(
         self,
@@ -367,49 +554,25 @@ class SQLGenerator:
 
         # Primary entity (first in list)
         primary_entity = query.entities[0]
-        primary_schema = self.SCHEMA.get(primary_entity, self.SCHEMA['projects'])
-
-        primary_alias = primary_schema['alias']
-        primary_table = primary_schema['table']
+        primary_alias, primary_table, _, _ = self._entity_meta(primary_entity)
 
         # Build SELECT clause based on requested_columns
-        select_columns = []
-
-        if query.requested_columns:
-            # User explicitly requested specific columns
-            for logical_col in query.requested_columns:
-                # Determine which entity this column belongs to
-                if logical_col in ['first_name', 'last_name', 'email']:
-                    # Profile columns
-                    if 'profiles' in query.entities:
-                        related_alias = self.SCHEMA['profiles']['alias']
-                        select_columns.append(f"{related_alias}.{logical_col}")
-                elif logical_col in ['total_amount', 'spent', 'remaining', 'total_spent', 'remaining_amount']:
-                    # Budget columns
-                    if 'v_budgets_full' in query.entities:
-                        budget_alias = self.SCHEMA['v_budgets_full']['alias']
-                        # Map logical names to actual column names
-                        col_map = {'spent': 'total_spent', 'remaining': 'remaining_amount'}
-                        actual_col = col_map.get(logical_col, logical_col)
-                        select_columns.append(f"{budget_alias}.{actual_col}")
-                else:
-                    # Primary entity columns
-                    actual_col = self._get_column_name(primary_entity, logical_col)
-                    select_columns.append(f"{primary_alias}.{actual_col}")
-        else:
-            # Auto-select: only name column by default
-            name_col = self._get_column_name(primary_entity, 'name')
-            select_columns.append(f"{primary_alias}.{name_col}")
+        select_clause = self._complex_select_clause(
+            primary_entity,
+            'profiles' in query.entities,
+            'v_budgets_full' in query.entities,
+            tuple(query.requested_columns),
+        )
 
         # Build JOINs and add columns from related entities
-        joins = []
-        for i, related_entity in enumerate(query.entities[1:], start=1):
-            if related_entity not in self.SCHEMA:
-                continue
+        # Choose JOIN type based on flags: LEFT JOIN for "without" queries (will filter NULL later)
+        # and "and their" queries, INNER JOIN for "with" queries
+        join_type = "INNER JOIN" if query.require_all_entities and not query.exclude_related else "LEFT JOIN"
 
-            related_schema = self.SCHEMA[related_entity]
-            related_alias = related_schema['alias']
-            related_table = related_schema['table']
+        joins = []
+        valid_related = [entity for entity in query.entities[1:] if entity in self.SCHEMA]
+        for related_entity in valid_related:
+            related_alias, related_table, _, _ = self._entity_meta(related_entity)
 
             # Find JOIN condition from relations
             join_condition = self._find_join_condition(
@@ -418,35 +581,19 @@ class SQLGenerator:
             )
 
             if join_condition:
-                # Choose JOIN type based on flags
-                if query.exclude_related:
-                    # LEFT JOIN for "without" queries (will filter NULL later)
-                    join_type = "LEFT JOIN"
-                elif query.require_all_entities:
-                    # INNER JOIN for "with" queries
-                    join_type = "INNER JOIN"
-                else:
-                    # LEFT JOIN for "and their" queries
-                    join_type = "LEFT JOIN"
-
                 joins.append(f"{join_type} {related_table} {related_alias} ON {join_condition}")
 
         # Build SQL
-        select_clause = ",\n    ".join(select_columns) if select_columns else f"{primary_alias}.*"
-
-        sql = f"""
-SELECT
-    {select_clause}
-FROM {primary_table} {primary_alias}
-"""
-
-        # Add JOINs
-        for join in joins:
-            sql += join + "\n"
-
-        sql += "WHERE 1=1\n"
-
+        parts = [
+            "SELECT",
+            f"    {select_clause}",
+            f"FROM {primary_table} {primary_alias}",
+        ]
+        parts.extend(joins)
+
+        where = []
         params = {}
+        filters = query.filters
 
         # For exclude_related queries, apply filters to related entity (not primary)
         if query.exclude_related and len(query.entities) > 1:
@@ -457,43 +604,96 @@ FROM {primary_table} {primary_alias}
                 related_alias = related_schema['alias']
 
                 # Apply status/date filters to related entity
-                sql, params = self._apply_filters(sql, params, query.filters, related_alias, related_entity)
+                self._apply_filters(where, params, filters, related_alias, related_entity)
 
                 # Add IS NULL check to find entities WITHOUT related records
                 related_id_col = self._get_column_name(related_entity, 'id')
-                sql += f" AND {related_alias}.{related_id_col} IS NULL"
+                where.append(f"{related_alias}.{related_id_col} IS NULL")
         else:
             # Normal query: apply filters on primary entity
-            sql, params = self._apply_filters(sql, params, query.filters, primary_alias, primary_entity)
+            self._apply_filters(where, params, filters, primary_alias, primary_entity)
 
             # Apply filters on related entities (budget, hours, etc.)
-            sql, params = self._apply_related_filters(sql, params, query.filters, query.entities)
+            self._apply_related_filters(where, params, filters, query.entities)
 
         # Apply RBAC
-        sql = self._apply_rbac_filter(sql, primary_entity, user_role, user_id, primary_alias)
+        self._apply_rbac_filter(where, params, primary_entity, user_role, user_id, primary_alias)
 
         # Apply personalization if needed
         if query.personalized and user_id:
-            sql, params = self._apply_personalization(sql, params, primary_entity, user_id, primary_alias)
+            self._apply_personalization(where, params, primary_entity, user_id, primary_alias)
+
+        parts.extend(_where_lines(where))
 
         # Add ORDER BY
         created_col = self._get_column_name(primary_entity, 'created_at')
-        sql += f"\nORDER BY {primary_alias}.{created_col} DESC"
+        parts.append(f"ORDER BY {primary_alias}.{created_col} DESC")
 
         # Limit results
-        sql += f"\nLIMIT 100"
+        parts.append("LIMIT 100")
 
-        return sql, params
+        return "\n".join(parts), params
+
+    @classmethod
+    @lru_cache(maxsize=512)
+    def _complex_select_clause(
+        cls,
+        primary_entity: str,
+        has_profiles: bool,
+        has_budgets: bool,
+        requested_columns: Tuple[str, ...]
+    ) -> str:
+        """
+        Build the SELECT column list of a complex join once per entity and requested columns
+
+        Args:
+            primary_entity: First entity of the query
+            has_profiles: Whether profiles is joined (first_name, last_name, email come from it)
+            has_budgets: Whether v_budgets_full is joined (budget columns come from it)
+            requested_columns: Logical column names, empty for the default
+
+        Returns:
+            Comma/newline-separated column list
+        """
+        primary_alias, _, _, primary_name_col = cls._entity_meta(primary_entity)
+
+        if not requested_columns:
+            # Auto-select: only name column by default
+            return f"{primary_alias}.{primary_name_col}"
 
+        # User explicitly requested specific columns
+        select_columns = []
+        for logical_col in requested_columns:
+            # Determine which entity this column belongs to
+            if logical_col in cls.PROFILE_COLUMNS:
+                # Profile columns
+                if has_profiles:
+                    related_alias = cls.SCHEMA['profiles']['alias']
+                    select_columns.append(f"{related_alias}.{logical_col}")
+            elif logical_col in cls.BUDGET_COLUMNS:
+                # Budget columns
+                if has_budgets:
+                    budget_alias = cls.SCHEMA['v_budgets_full']['alias']
+                    # Map logical names to actual column names
+                    actual_col = cls.BUDGET_COLUMN_NAMES.get(logical_col, logical_col)
+                    select_columns.append(f"{budget_alias}.{actual_col}")
+            else:
+                # Primary entity columns
+                actual_col = cls._get_column_name(primary_entity, logical_col)
+                select_columns.append(f"{primary_alias}.{actual_col}")
+        return ",\n    ".join(select_columns) if select_columns else f"{primary_alias}.*"
+
+    @classmethod
+    @lru_cache(maxsize=256)
     def _find_join_condition(
-        self,
+        cls,
         primary_entity: str,
         primary_alias: str,
         related_entity: str,
         related_alias: str
     ) -> Optional[str]:
         """
-        Find JOIN condition between two entities based on SCHEMA relations
+        Find JOIN condition between two entities based on SCHEMA relations (cached - pure lookup)
 
         Args:
             primary_entity: Primary table name (e.g., 'objects')
@@ -504,32 +704,29 @@ FROM {primary_table} {primary_alias}
         Returns:
             JOIN condition string or None
         """
-        primary_schema = self.SCHEMA.get(primary_entity)
-        related_schema = self.SCHEMA.get(related_entity)
+        primary_schema = cls.SCHEMA.get(primary_entity)
+        related_schema = cls.SCHEMA.get(related_entity)
 
         if not primary_schema or not related_schema:
             return None
 
-        # Strategy 1: Check primary → related relation
-        for rel_name, (rel_table, fk, pk) in primary_schema.get('relations', {}).items():
-            if rel_table == related_entity:
+        # Strategy 1/2: declared relation, primary → related first, then related → primary
+        relation = cls.RELATION_INDEX.get(primary_entity, {}).get(related_entity)
+        if relation:
+            direction, fk, pk = relation
+            if direction == 'forward':
                 return f"{related_alias}.{pk} = {primary_alias}.{fk}"
-
-        # Strategy 2: Check related → primary relation (reverse)
-        for rel_name, (rel_table, fk, pk) in related_schema.get('relations', {}).items():
-            if rel_table == primary_entity:
-                return f"{primary_alias}.{pk} = {related_alias}.{fk}"
+            return f"{primary_alias}.{pk} = {related_alias}.{fk}"
 
         # Strategy 3: Common column name matching (fallback)
         # Try to find common foreign key patterns
-        primary_cols = primary_schema.get('columns', [])
-        related_cols = related_schema.get('columns', [])
+        primary_cols = cls.COLUMN_SETS[primary_entity]
 
         # Check if primary has FK to related (e.g., objects.responsible_id → profiles.user_id)
         if related_entity == 'profiles':
-            for col in primary_cols:
-                if 'responsible' in col.lower():
-                    return f"{related_alias}.user_id = {primary_alias}.{col}"
+            responsible_col = cls.RESPONSIBLE_COLUMNS[primary_entity]
+            if responsible_col:
+                return f"{related_alias}.user_id = {primary_alias}.{responsible_col}"
 
         # Check for project_id links
         if related_entity == 'projects':
@@ -543,16 +740,10 @@ FROM {primary_table} {primary_alias}
 
         # Special case: v_budgets_full needs entity_type filter
         if related_entity == 'v_budgets_full':
-            if primary_entity == 'projects':
-                # Budget for projects
-                primary_id = self._get_column_name(primary_entity, 'id')
-                return f"{related_alias}.entity_id = {primary_alias}.{primary_id} AND {related_alias}.entity_type = 'project'"
-            elif primary_entity == 'stages':
-                primary_id = self._get_column_name(primary_entity, 'id')
-                return f"{related_alias}.entity_id = {primary_alias}.{primary_id} AND {related_alias}.entity_type = 'stage'"
-            elif primary_entity == 'objects':
-                primary_id = self._get_column_name(primary_entity, 'id')
-                return f"{related_alias}.entity_id = {primary_alias}.{primary_id} AND {related_alias}.entity_type = 'object'"
+            entity_type = cls.BUDGET_ENTITY_TYPES.get(primary_entity)
+            if entity_type:
+                primary_id = cls._get_column_name(primary_entity, 'id')
+                return f"{related_alias}.entity_id = {primary_alias}.{primary_id} AND {related_alias}.entity_type = '{entity_type}'"
 
         # No relation found
         return None
@@ -566,84 +757,114 @@ FROM {primary_table} {primary_alias}
         """Generate SQL for chart visualization (pie, bar, line, area, radar, radialBar)"""
 
         entity = query.entities[0] if query.entities else 'projects'
-        schema = self.SCHEMA.get(entity, self.SCHEMA['projects'])
+        alias = self._entity_meta(entity)[0]
+
+        # radialBar (progress/ratings) needs individual items with progress values
+        if query.chart_type == 'radialBar' and (
+            'progress' in query.metrics or entity in self.RADIALBAR_ENTITIES
+        ):
+            chart_kind = 'radialBar'
+        elif query.chart_type == 'radar':
+            # Multi-dimensional comparison
+            chart_kind = 'radar'
+        elif self._can_use_chart_mview(query, entity, user_role):
+            # Default chart without filters: pre-aggregated view
+            parts = [
+                "SELECT label, value",
+                f"FROM {CHART_MVIEWS[entity]}",
+                "ORDER BY value DESC",
+                "LIMIT 20",
+            ]
+            return "\n".join(parts), {}
+        else:
+            # Default: pie, bar, line, area - group by column and count
+            chart_kind = 'default'
 
-        alias = schema['alias']
-        table = schema['table']
-        group_col = schema['group_by_column']
-        name_col = self._get_column_name(entity, 'name')
+        head, tail = self._chart_skeleton(entity, chart_kind)
 
-        params = {}
+        # User filters and RBAC go between the cached SELECT/FROM and GROUP BY/ORDER BY/LIMIT
+        filters = query.filters
+        shape = self._filter_shape(filters, entity) if filters else None
+        clauses, binds_user_id = self._where_clauses(entity, alias, shape, False, user_role, bool(user_id))
 
-        # Special handling for radialBar (progress/ratings)
-        if query.chart_type == 'radialBar':
-            # For radialBar we need individual items with progress values
-            if 'progress' in query.metrics or entity in ['stages', 'objects', 'sections']:
-                progress_col = self._get_column_name(entity, 'progress') if 'progress' in schema.get('columns', []) else None
-
-                if progress_col:
-                    sql = f"""
-SELECT
-    {alias}.{name_col} as label,
-    COALESCE({alias}.{progress_col}, 0) as value
-FROM {table} {alias}
-WHERE 1=1
-"""
-                else:
-                    # For entities without progress column, calculate completion rate based on status
-                    status_col = self._get_column_name(entity, 'status')
-                    sql = f"""
-SELECT
-    {alias}.{name_col} || ' (' || {alias}.{status_col} || ')' as label,
-    CASE WHEN {alias}.{status_col} = 'completed' THEN 100
-         WHEN {alias}.{status_col} = 'active' THEN 50
-         ELSE 0 END as value,
-    {alias}.{status_col} as status
-FROM {table} {alias}
-WHERE 1=1
-"""
-                # Apply filters and RBAC
-                sql, params = self._apply_filters(sql, params, query.filters, alias, entity)
-                sql = self._apply_rbac_filter(sql, entity, user_role, user_id, alias)
-                sql += f"\nORDER BY value DESC"
-                sql += f"\nLIMIT 10"
-                return sql, params
-
-        # Special handling for radar (multi-dimensional comparison)
-        if query.chart_type == 'radar':
-            sql = f"""
-SELECT
-    {alias}.{name_col} as label,
-    COALESCE(AVG({alias}.{self._get_column_name(entity, 'progress') if 'progress' in schema.get('columns', []) else 'NULL'}), 0) as value
-FROM {table} {alias}
-WHERE 1=1
-"""
-            sql, params = self._apply_filters(sql, params, query.filters, alias, entity)
-            sql = self._apply_rbac_filter(sql, entity, user_role, user_id, alias)
-            sql += f"\nGROUP BY {alias}.{name_col}"
-            sql += f"\nLIMIT 10"
-            return sql, params
-
-        # Default: pie, bar, line, area - group by column and count
-        sql = f"""
-SELECT
-    {alias}.{group_col} as label,
-    COUNT(*) as value
-FROM {table} {alias}
-WHERE 1=1
-"""
+        sql = "\n".join((*head, *_where_lines(clauses), *tail))
+        return sql, self._bind_params(filters, shape, binds_user_id, user_id)
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _chart_skeleton(cls, entity: str, chart_kind: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+        """
+        Build the static part of a chart query once per (entity, chart kind)
+
+        Args:
+            entity: Entity name
+            chart_kind: 'radialBar', 'radar' or 'default' (pie, bar, line, area)
 
-        # Apply user filters
-        sql, params = self._apply_filters(sql, params, query.filters, alias, entity)
+        Returns:
+            Tuple of (SELECT/FROM lines, GROUP BY/ORDER BY/LIMIT lines)
+        """
+        alias, table, _, _ = cls._entity_meta(entity)
+        builder = getattr(cls, cls.CHART_SKELETON_BUILDERS.get(chart_kind, '_default_chart_columns'))
+        select_cols, tail = builder(entity)
 
-        # Apply RBAC filtering
-        sql = self._apply_rbac_filter(sql, entity, user_role, user_id, alias)
+        head = ("SELECT", "    " + ",\n    ".join(select_cols), f"FROM {table} {alias}")
+        return head, tail
 
-        sql += f"\nGROUP BY {alias}.{group_col}"
-        sql += f"\nORDER BY value DESC"
-        sql += f"\nLIMIT 20"
+    @classmethod
+    def _radialbar_chart_columns(cls, entity: str) -> Tuple[List[str], Tuple[str, ...]]:
+        """radialBar: one progress value per item (or a status-based completion rate)"""
+        alias, _, _, name_col = cls._entity_meta(entity)
 
-        return sql, params
+        if 'progress' in cls.COLUMN_SETS.get(entity, cls.COLUMN_SETS['projects']):
+            progress_col = cls._get_column_name(entity, 'progress')
+            select_cols = [
+                f"{alias}.{name_col} as label",
+                f"COALESCE({alias}.{progress_col}, 0) as value",
+            ]
+        else:
+            # For entities without progress column, calculate completion rate based on status
+            status_col = cls._get_column_name(entity, 'status')
+            select_cols = [
+                f"{alias}.{name_col} || ' (' || {alias}.{status_col} || ')' as label",
+                f"""CASE WHEN {alias}.{status_col} = 'completed' THEN 100
+         WHEN {alias}.{status_col} = 'active' THEN 50
+         ELSE 0 END as value""",
+                f"{alias}.{status_col} as status",
+            ]
+        return select_cols, ("ORDER BY value DESC", "LIMIT 10")
+
+    @classmethod
+    def _radar_chart_columns(cls, entity: str) -> Tuple[List[str], Tuple[str, ...]]:
+        """radar: average progress per item name"""
+        alias, _, _, name_col = cls._entity_meta(entity)
+
+        has_progress = 'progress' in cls.COLUMN_SETS.get(entity, cls.COLUMN_SETS['projects'])
+        progress_col = cls._get_column_name(entity, 'progress') if has_progress else 'NULL'
+        select_cols = [
+            f"{alias}.{name_col} as label",
+            f"COALESCE(AVG({alias}.{progress_col}), 0) as value",
+        ]
+        return select_cols, (f"GROUP BY {alias}.{name_col}", "LIMIT 10")
+
+    @classmethod
+    def _default_chart_columns(cls, entity: str) -> Tuple[List[str], Tuple[str, ...]]:
+        """pie, bar, line, area: row count per group_by_column value"""
+        alias, _, group_col, _ = cls._entity_meta(entity)
+
+        select_cols = [
+            f"{alias}.{group_col} as label",
+            "COUNT(*) as value",
+        ]
+        return select_cols, (f"GROUP BY {alias}.{group_col}", "ORDER BY value DESC", "LIMIT 20")
+
+    def _can_use_chart_mview(self, query: AnalyticsQuery, entity: str, user_role: str) -> bool:
+        """Check if default chart can be served from a materialized view (no filters, no RBAC rows)"""
+        if not settings.analytics_chart_mviews_enabled or entity not in CHART_MVIEWS:
+            return False
+        if user_role not in UNRESTRICTED_ROLES or not set(query.metrics) <= {'count'}:
+            return False
+        filters = query.filters
+        return not filters or self._filter_shape(filters, entity) == (0, None, False)
 
     def generate_report_sql(
         self,
@@ -654,59 +875,50 @@ WHERE 1=1
         """Generate SQL for detailed report"""
 
         entity = query.entities[0] if query.entities else 'projects'
-        schema = self.SCHEMA.get(entity, self.SCHEMA['projects'])
-
-        alias = schema['alias']
-        table = schema['table']
-        columns = schema['columns']
+        alias, table, _, _ = self._entity_meta(entity)
 
         # Build SELECT based on requested_columns
-        if query.requested_columns:
-            # User explicitly requested specific columns
-            select_cols = []
-            for logical_col in query.requested_columns:
-                actual_col = self._get_column_name(entity, logical_col)
-                # Skip UUID/ID columns
-                if (actual_col.endswith('_id') or actual_col == 'id' or
-                    actual_col.endswith('_responsible') or actual_col.endswith('_manager') or
-                    actual_col == 'responsible' or actual_col == 'manager'):
-                    continue
-                select_cols.append(f"{alias}.{actual_col}")
-
-            # If no valid columns after filtering, default to name
-            if not select_cols:
-                name_col = self._get_column_name(entity, 'name')
-                select_cols.append(f"{alias}.{name_col}")
-        else:
-            # Default: only name column
-            name_col = self._get_column_name(entity, 'name')
-            select_cols = [f"{alias}.{name_col}"]
-
-        sql = f"""
-SELECT
-    {', '.join(select_cols)}
-FROM {table} {alias}
-WHERE 1=1
-"""
-
-        params = {}
-
-        # Apply filters
-        sql, params = self._apply_filters(sql, params, query.filters, alias, entity)
-
-        # Apply personalization (if query has "мои/мой/моя")
-        if query.personalized and user_id:
-            sql, params = self._apply_personalization(sql, params, entity, user_id, alias)
-
-        # Apply RBAC
-        sql = self._apply_rbac_filter(sql, entity, user_role, user_id, alias)
+        select_clause = self._report_select_clause(entity, tuple(query.requested_columns))
+
+        parts = [
+            "SELECT",
+            f"    {select_clause}",
+            f"FROM {table} {alias}",
+        ]
+
+        # Filters, personalization (if query has "мои/мой/моя") and RBAC in one pass
+        filters = query.filters
+        shape = self._filter_shape(filters, entity) if filters else None
+        personalized = bool(query.personalized and user_id)
+        clauses, binds_user_id = self._where_clauses(
+            entity, alias, shape, personalized, user_role, bool(user_id)
+        )
+        parts.extend(_where_lines(clauses))
 
         # Use dynamic column name for created_at
         created_col = self._get_column_name(entity, 'created_at')
-        sql += f"\nORDER BY {alias}.{created_col} DESC"
-        sql += f"\nLIMIT 100"
+        parts.append(f"ORDER BY {alias}.{created_col} DESC")
+        parts.append("LIMIT 100")
+
+        return "\n".join(parts), self._bind_params(filters, shape, binds_user_id, user_id)
+
+    @classmethod
+    @lru_cache(maxsize=512)
+    def _report_select_clause(cls, entity: str, requested_columns: Tuple[str, ...]) -> str:
+        """Build the SELECT column list of a report once per entity and requested columns"""
+        alias, _, _, name_col = cls._entity_meta(entity)
+
+        # User explicitly requested specific columns
+        select_cols = []
+        for logical_col in requested_columns:
+            actual_col = cls._get_column_name(entity, logical_col)
+            # Skip UUID/ID columns
+            if actual_col.endswith(cls.REPORT_SKIP_SUFFIXES) or actual_col in cls.REPORT_SKIP_EXACT:
+                continue
+            select_cols.append(f"{alias}.{actual_col}")
 
-        return sql, params
+        # Default (or no valid columns after filtering): only name column
+        return ', '.join(select_cols) if select_cols else f"{alias}.{name_col}"
 
     def generate_statistics_sql(
         self,
@@ -717,44 +929,43 @@ WHERE 1=1
         """Generate SQL for statistical aggregation"""
 
         entity = query.entities[0] if query.entities else 'projects'
-        schema = self.SCHEMA.get(entity, self.SCHEMA['projects'])
+        alias = self._entity_meta(entity)[0]
+
+        # Filters, personalization (if query has "мои/мой/моя") and RBAC in one pass
+        filters = query.filters
+        shape = self._filter_shape(filters, entity) if filters else None
+        personalized = bool(query.personalized and user_id)
+        clauses, binds_user_id = self._where_clauses(
+            entity, alias, shape, personalized, user_role, bool(user_id)
+        )
 
-        alias = schema['alias']
-        table = schema['table']
+        sql = "\n".join((*self._statistics_skeleton(entity), *_where_lines(clauses)))
+        return sql, self._bind_params(filters, shape, binds_user_id, user_id)
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _statistics_skeleton(cls, entity: str) -> Tuple[str, ...]:
+        """Build the SELECT/FROM lines of a statistics query once per entity"""
+        alias, table, _, _ = cls._entity_meta(entity)
 
         # Use dynamic column name for status
-        status_col = self._get_column_name(entity, 'status')
+        status_col = cls._get_column_name(entity, 'status')
 
         # Common statistics
-        sql = f"""
-SELECT
-    COUNT(*) as total_count,
-    COUNT(DISTINCT {alias}.{status_col}) as unique_statuses
-"""
+        select_cols = [
+            "COUNT(*) as total_count",
+            f"COUNT(DISTINCT {alias}.{status_col}) as unique_statuses",
+        ]
 
         # Add progress metrics if available
-        if 'progress' in schema['columns']:
-            sql += f""",
-    AVG({alias}.progress) as avg_progress,
-    MIN({alias}.progress) as min_progress,
-    MAX({alias}.progress) as max_progress
-"""
-
-        sql += f"\nFROM {table} {alias}\nWHERE 1=1"
+        if 'progress' in cls.COLUMN_SETS.get(entity, cls.COLUMN_SETS['projects']):
+            select_cols.extend([
+                f"AVG({alias}.progress) as avg_progress",
+                f"MIN({alias}.progress) as min_progress",
+                f"MAX({alias}.progress) as max_progress",
+            ])
 
-        params = {}
-
-        # Apply filters
-        sql, params = self._apply_filters(sql, params, query.filters, alias, entity)
-
-        # Apply personalization (if query has "мои/мой/моя")
-        if query.personalized and user_id:
-            sql, params = self._apply_personalization(sql, params, entity, user_id, alias)
-
-        # Apply RBAC
-        sql = self._apply_rbac_filter(sql, entity, user_role, user_id, alias)
-
-        return sql, params
+        return ("SELECT", "    " + ",\n    ".join(select_cols), f"FROM {table} {alias}")
 
     def generate_comparison_sql(
         self,
@@ -765,41 +976,48 @@ SELECT
         """Generate SQL for comparison queries"""
 
         entity = query.entities[0] if query.entities else 'projects'
-        schema = self.SCHEMA.get(entity, self.SCHEMA['projects'])
+        filters = query.filters
+        shape = self._filter_shape(filters, entity) if filters else None
+        personalized = bool(query.personalized and user_id)
 
-        alias = schema['alias']
-        table = schema['table']
-        group_col = schema['group_by_column']
+        sql, binds_user_id = self._comparison_plan(entity, shape, personalized, user_role, bool(user_id))
+        return sql, self._bind_params(filters, shape, binds_user_id, user_id)
 
-        # Use dynamic column name for status
-        status_col = self._get_column_name(entity, 'status')
-
-        sql = f"""
-SELECT
-    {alias}.{group_col} as category,
-    COUNT(*) as count,
-    AVG(CASE WHEN {alias}.{status_col} = 'completed' THEN 1 ELSE 0 END) * 100 as completion_rate
-FROM {table} {alias}
-WHERE 1=1
-"""
-
-        params = {}
-
-        # Apply filters
-        sql, params = self._apply_filters(sql, params, query.filters, alias, entity)
-
-        # Apply personalization (if query has "мои/мой/моя")
-        if query.personalized and user_id:
-            sql, params = self._apply_personalization(sql, params, entity, user_id, alias)
-
-        # Apply RBAC
-        sql = self._apply_rbac_filter(sql, entity, user_role, user_id, alias)
+    @classmethod
+    @lru_cache(maxsize=512)
+    def _comparison_plan(
+        cls,
+        entity: str,
+        shape: Optional[Tuple[int, Optional[str], bool]],
+        personalized: bool,
+        user_role: str,
+        has_user_id: bool
+    ) -> Tuple[str, bool]:
+        """
+        Build comparison SQL text once per query shape; parameter values are bound per request
 
-        sql += f"\nGROUP BY {alias}.{group_col}"
-        sql += f"\nORDER BY count DESC"
-        sql += f"\nLIMIT 20"
+        Returns:
+            Tuple of (sql, whether it uses %(user_id)s)
+        """
+        alias, table, group_col, _ = cls._entity_meta(entity)
 
-        return sql, params
+        # Use dynamic column name for status
+        status_col = cls._get_column_name(entity, 'status')
+
+        clauses, binds_user_id = cls._where_clauses(entity, alias, shape, personalized, user_role, has_user_id)
+
+        parts = [
+            "SELECT",
+            f"    {alias}.{group_col} as category,",
+            "    COUNT(*) as count,",
+            f"    AVG(CASE WHEN {alias}.{status_col} = 'completed' THEN 1 ELSE 0 END) * 100 as completion_rate",
+            f"FROM {table} {alias}",
+            *_where_lines(clauses),
+            f"GROUP BY {alias}.{group_col}",
+            "ORDER BY count DESC",
+            "LIMIT 20",
+        ]
+        return "\n".join(parts), binds_user_id
 
     def generate_ranking_sql(
         self,
@@ -815,25 +1033,59 @@ WHERE 1=1
         - "Какие 5 сотрудников имеют больше всего задач"
         - "Топ проекты по бюджету"
         """
-        params = {}
-
-        # Determine what we're ranking and what we're counting
-        # Primary entity is what we count/show, related entity is for metrics
         primary_entity = query.entities[0] if query.entities else 'projects'
 
-        # If there's a second entity (like v_budgets_full), use it for JOIN
-        related_entity = None
-        if len(query.entities) > 1:
-            related_entity = query.entities[1]
-
         # Group entity is what we group by (for employee rankings)
         group_entity = query.group_by_entity or primary_entity
+        filters = query.filters
+        has_status = bool(filters and filters.status)
+
+        plan = self._ranking_plan(
+            primary_entity,
+            query.entities[1] if len(query.entities) > 1 else None,
+            group_entity,
+            query.order_by or 'count',
+            ORDER_DIRECTIONS.get((query.order_direction or 'desc').lower(), 'DESC'),
+            min(max(int(query.limit or 10), 1), MAX_RANKING_LIMIT),
+            has_status,
+            user_role,
+            bool(user_id),
+        )
+        if plan is None:
+            logger.warning(f"No join condition found between {primary_entity} and {group_entity}")
+            return self.generate_report_sql(query, user_role, user_id)
 
-        primary_schema = self.SCHEMA.get(primary_entity, self.SCHEMA['projects'])
-        group_schema = self.SCHEMA.get(group_entity, self.SCHEMA['profiles'])
+        sql, binds_user_id = plan
+        params = {}
+        if has_status:
+            params['status'] = filters.status
+        if binds_user_id:
+            params['user_id'] = user_id
+        return sql, params
 
-        primary_alias = primary_schema['alias']
-        primary_table = primary_schema['table']
+    @classmethod
+    @lru_cache(maxsize=512)
+    def _ranking_plan(
+        cls,
+        primary_entity: str,
+        related_entity: Optional[str],
+        group_entity: str,
+        order_metric: str,
+        order_direction: str,
+        limit: int,
+        has_status: bool,
+        user_role: str,
+        has_user_id: bool
+    ) -> Optional[Tuple[str, bool]]:
+        """
+        Build ranking SQL text once per query shape; parameter values are bound per request
+
+        Returns:
+            Tuple of (sql, whether it uses %(user_id)s), or None if the group entity cannot be joined
+        """
+        # Primary entity is what we count/show, related entity (like v_budgets_full) is for metrics
+        primary_alias, primary_table, _, _ = cls._entity_meta(primary_entity)
+        group_schema = cls.SCHEMA.get(group_entity, cls.DEFAULT_GROUP_SCHEMA)
 
         # If grouping by same entity as primary, no separate group table
         if group_entity == primary_entity:
@@ -845,28 +1097,24 @@ WHERE 1=1
 
         # Find the join condition
         if group_entity != primary_entity:
-            join_condition = self._find_join_condition(
+            join_condition = cls._find_join_condition(
                 primary_entity, primary_alias,
                 group_entity, group_alias
             )
 
             if not join_condition:
                 # Try reverse direction
-                join_condition = self._find_join_condition(
+                join_condition = cls._find_join_condition(
                     group_entity, group_alias,
                     primary_entity, primary_alias
                 )
 
             if not join_condition:
-                logger.warning(f"No join condition found between {primary_entity} and {group_entity}")
-                return self.generate_report_sql(query, user_role, user_id)
+                return None
         else:
             # Same entity - no join needed
             join_condition = None
 
-        # Determine metric to order by
-        order_metric = query.order_by or 'count'
-
         # Build SELECT based on group entity (what we show) and metric
         if group_entity == 'profiles':
             select_cols = [
@@ -879,90 +1127,70 @@ WHERE 1=1
                 f"{group_alias}.last_name"
             ]
         else:
-            name_col = self._get_column_name(group_entity, 'name')
-            id_col = self._get_column_name(group_entity, 'id')
+            name_col = cls._get_column_name(group_entity, 'name')
+            id_col = cls._get_column_name(group_entity, 'id')
             select_cols = [f"{group_alias}.{name_col}"]
             group_by_cols = [f"{group_alias}.{id_col}", f"{group_alias}.{name_col}"]
 
-        # Add the aggregate column
-        if order_metric == 'count':
-            select_cols.append(f"COUNT({primary_alias}.*) as count")
-        elif order_metric in ['total_amount', 'budget']:
-            select_cols.append(f"SUM(b.total_amount) as total_budget")
-        elif order_metric in ['spent', 'total_spent']:
-            # For overrun/overspent queries, calculate (spent - budget) as overrun
-            select_cols.append(f"SUM(b.total_spent - b.total_amount) as overrun")
-            select_cols.append(f"SUM(b.total_spent) as total_spent")
-            select_cols.append(f"SUM(b.total_amount) as total_budget")
-        elif order_metric == 'hours':
-            select_cols.append(f"SUM(pd.hours_actual_total) as total_hours")
-        else:
-            select_cols.append(f"COUNT({primary_alias}.*) as count")
+        # Add the aggregate column(s) for the metric
+        metric_selects, order_col, having = cls.RANKING_METRICS.get(order_metric, cls.RANKING_METRICS['count'])
+        select_cols.extend(fragment.format(alias=primary_alias) for fragment in metric_selects)
 
         # Build the SQL
-        sql = f"""
-SELECT
-    {', '.join(select_cols)}
-FROM {primary_table} {primary_alias}
-"""
+        parts = [
+            "SELECT",
+            f"    {', '.join(select_cols)}",
+            f"FROM {primary_table} {primary_alias}",
+        ]
 
         # Add JOIN to related entity if exists (e.g., v_budgets_full)
         if related_entity:
-            related_schema = self.SCHEMA.get(related_entity)
+            related_schema = cls.SCHEMA.get(related_entity)
             if related_schema:
                 related_alias = related_schema['alias']
                 related_table = related_schema['table']
 
                 # Find join condition to related entity
-                related_join = self._find_join_condition(
+                related_join = cls._find_join_condition(
                     primary_entity, primary_alias,
                     related_entity, related_alias
                 )
 
                 if related_join:
-                    sql += f"INNER JOIN {related_table} {related_alias} ON {related_join}\n"
+                    parts.append(f"INNER JOIN {related_table} {related_alias} ON {related_join}")
 
         # Add JOIN to group entity if different from primary
         if join_condition:
-            sql += f"INNER JOIN {group_table} {group_alias} ON {join_condition}\n"
+            parts.append(f"INNER JOIN {group_table} {group_alias} ON {join_condition}")
 
-        sql += "WHERE 1=1\n"
+        where = []
 
         # Apply filters on primary entity
-        status_col = self._get_column_name(primary_entity, 'status')
-        if query.filters and query.filters.status:
-            sql += f" AND {primary_alias}.{status_col} = %(status)s"
-            params['status'] = query.filters.status
+        status_col = cls._get_column_name(primary_entity, 'status')
+        if has_status:
+            where.append(f"{primary_alias}.{status_col} = %(status)s")
 
         # Apply RBAC
-        sql = self._apply_rbac_filter(sql, primary_entity, user_role, user_id, primary_alias)
+        rbac_clause, binds_user_id = cls._rbac_clause(primary_entity, user_role, has_user_id, primary_alias)
+        if rbac_clause:
+            where.append(rbac_clause)
+
+        parts.extend(_where_lines(where))
 
         # GROUP BY
-        sql += f"\nGROUP BY {', '.join(group_by_cols)}"
+        parts.append(f"GROUP BY {', '.join(group_by_cols)}")
 
         # For overrun queries, filter only projects with negative remaining_amount
-        if order_metric in ['spent', 'total_spent'] and related_entity == 'v_budgets_full':
-            sql += f"\nHAVING SUM(b.total_spent - b.total_amount) > 0"
+        if having and related_entity == 'v_budgets_full':
+            parts.append(having)
 
         # ORDER BY
-        order_direction = query.order_direction or 'desc'
-        if order_metric == 'count':
-            sql += f"\nORDER BY count {order_direction.upper()}"
-        elif order_metric in ['total_amount', 'budget']:
-            sql += f"\nORDER BY total_budget {order_direction.upper()}"
-        elif order_metric in ['spent', 'total_spent']:
-            # Order by overrun amount (spent - budget)
-            sql += f"\nORDER BY overrun {order_direction.upper()}"
-        elif order_metric == 'hours':
-            sql += f"\nORDER BY total_hours {order_direction.upper()}"
-        else:
-            sql += f"\nORDER BY count {order_direction.upper()}"
+        parts.append(f"ORDER BY {order_col} {order_direction}")
 
         # LIMIT
-        limit = query.limit or 10
-        sql += f"\nLIMIT {limit}"
+        parts.append(f"LIMIT {limit}")
 
-        return sql, params
+        return "\n".join(parts), binds_user_id
 
     def generate_generic_sql(
         self,
@@ -973,229 +1201,294 @@ FROM {primary_table} {primary_alias}
         """Generate generic SQL for unclassified queries"""
 
         entity = query.entities[0] if query.entities else 'projects'
-        schema = self.SCHEMA.get(entity, self.SCHEMA['projects'])
+        filters = query.filters
+        shape = self._filter_shape(filters, entity) if filters else None
+        personalized = bool(query.personalized and user_id)
 
-        alias = schema['alias']
-        table = schema['table']
+        sql, binds_user_id = self._generic_plan(entity, shape, personalized, user_role, bool(user_id))
+        return sql, self._bind_params(filters, shape, binds_user_id, user_id)
+
+    @classmethod
+    @lru_cache(maxsize=512)
+    def _generic_plan(
+        cls,
+        entity: str,
+        shape: Optional[Tuple[int, Optional[str], bool]],
+        personalized: bool,
+        user_role: str,
+        has_user_id: bool
+    ) -> Tuple[str, bool]:
+        """
+        Build generic SQL text once per query shape; parameter values are bound per request
+
+        Returns:
+            Tuple of (sql, whether it uses %(user_id)s)
+        """
+        alias, table, _, _ = cls._entity_meta(entity)
 
         # Select all main columns
-        columns = schema['columns']
+        columns = cls.SCHEMA.get(entity, cls.DEFAULT_SCHEMA)['columns']
         select_cols = [f"{alias}.{col}" for col in columns]
 
-        sql = f"""
-SELECT
-    {', '.join(select_cols)}
-FROM {table} {alias}
-WHERE 1=1
-"""
+        # Use dynamic column name for created_at
+        created_col = cls._get_column_name(entity, 'created_at')
+
+        clauses, binds_user_id = cls._where_clauses(entity, alias, shape, personalized, user_role, has_user_id)
+
+        parts = [
+            "SELECT",
+            f"    {', '.join(select_cols)}",
+            f"FROM {table} {alias}",
+            *_where_lines(clauses),
+            f"ORDER BY {alias}.{created_col} DESC",
+            "LIMIT 50",
+        ]
+        return "\n".join(parts), binds_user_id
+
+    @classmethod
+    def _where_clauses(
+        cls,
+        entity: str,
+        alias: str,
+        shape: Optional[Tuple[int, Optional[str], bool]],
+        personalized: bool,
+        user_role: str,
+        has_user_id: bool
+    ) -> Tuple[List[str], bool]:
+        """
+        Collect filter, personalization and RBAC clauses for a query shape (in that order)
 
-        params = {}
+        Args:
+            entity: Entity name
+            alias: Table alias
+            shape: Filter shape from _filter_shape, None without filters
+            personalized: Whether "my ..." personalization applies (query personalized and user known)
+            user_role: User role for RBAC
+            has_user_id: Whether the user ID is known
 
-        # Apply filters
-        sql, params = self._apply_filters(sql, params, query.filters, alias, entity)
+        Returns:
+            Tuple of (WHERE predicates, whether any of them uses %(user_id)s)
+        """
+        clauses = list(cls._build_filter_clauses(entity, alias, shape)) if shape else []
+        binds_user_id = False
 
-        # Apply personalization (if query has "мои/мой/моя")
-        if query.personalized and user_id:
-            sql, params = self._apply_personalization(sql, params, entity, user_id, alias)
+        if personalized:
+            personalization_clause = cls._personalization_clause(entity, alias)
+            if personalization_clause:
+                clauses.append(personalization_clause)
+                binds_user_id = True
 
-        # Apply RBAC
-        sql = self._apply_rbac_filter(sql, entity, user_role, user_id, alias)
+        rbac_clause, rbac_binds_user_id = cls._rbac_clause(entity, user_role, has_user_id, alias)
+        if rbac_clause:
+            clauses.append(rbac_clause)
+            binds_user_id = binds_user_id or rbac_binds_user_id
 
-        # Use dynamic column name for created_at
-        created_col = self._get_column_name(entity, 'created_at')
-        sql += f"\nORDER BY {alias}.{created_col} DESC"
-        sql += f"\nLIMIT 50"
+        return clauses, binds_user_id
 
-        return sql, params
+    def _bind_params(
+        self,
+        filters: Optional[FilterOptions],
+        shape: Optional[Tuple[int, Optional[str], bool]],
+        binds_user_id: bool,
+        user_id: Optional[str]
+    ) -> Dict:
+        """Build the per-request parameters for SQL text produced from a cached plan"""
+        params = {}
+        if shape:
+            self._bind_filter_params(params, filters, shape)
+        if binds_user_id:
+            params['user_id'] = user_id
+        return params
 
     def _apply_filters(
         self,
-        sql: str,
+        where: List[str],
         params: Dict,
         filters: FilterOptions,
         alias: str,
         entity: str
-    ) -> Tuple[str, Dict]:
-        """Apply user-provided filters with parameterization"""
+    ) -> None:
+        """Append user-provided filter predicates to where, with parameterization"""
 
         if not filters:
-            return sql, params
+            return
 
-        # Use dynamic column names
-        status_col = self._get_column_name(entity, 'status')
-        created_col = self._get_column_name(entity, 'created_at')
+        shape = self._filter_shape(filters, entity)
+        where.extend(self._build_filter_clauses(entity, alias, shape))
+        self._bind_filter_params(params, filters, shape)
 
-        # Status filter - support multiple statuses separated by comma
-        if filters.status:
-            # Check if multiple statuses (comma-separated)
-            if ',' in filters.status:
-                statuses = [s.strip() for s in filters.status.split(',')]
-                placeholders = ', '.join([f"%(status_{i})s" for i in range(len(statuses))])
-                sql += f" AND {alias}.{status_col} IN ({placeholders})"
-                for i, status in enumerate(statuses):
-                    params[f'status_{i}'] = status
-            else:
-                # Single status
-                sql += f" AND {alias}.{status_col} = %(status)s"
-                params['status'] = filters.status
+    def _bind_filter_params(
+        self,
+        params: Dict,
+        filters: FilterOptions,
+        shape: Tuple[int, Optional[str], bool]
+    ) -> None:
+        """Add filter values to params; only values vary between calls with the same shape"""
+        status_shape, _, has_project_id = shape
+        if status_shape > 1:
+            params['statuses'] = [status.strip() for status in filters.status.split(',')]
+        elif status_shape == 1:
+            params['status'] = filters.status
+        if has_project_id:
+            params['project_id'] = filters.project_id
+
+    def _filter_shape(self, filters: FilterOptions, entity: str) -> Tuple[int, Optional[str], bool]:
+        """
+        Reduce filters to the part that determines the SQL text
+
+        Returns:
+            Tuple of (status filter: 0 = none, 1 = single, 2 = several,
+            known date_range preset or None, whether project_id filter applies)
+        """
+        status_shape = (2 if ',' in filters.status else 1) if filters.status else 0
+        date_range = filters.date_range if filters.date_range in DATE_RANGE_INTERVALS else None
+        # Project ID filter only for entities that have the column (stages/objects/sections)
+        has_project_id = bool(filters.project_id) and 'project_id' in self.COLUMN_SETS.get(entity, ())
+        return status_shape, date_range, has_project_id
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _build_filter_clauses(
+        cls,
+        entity: str,
+        alias: str,
+        shape: Tuple[int, Optional[str], bool]
+    ) -> Tuple[str, ...]:
+        """Build WHERE clauses for a filter shape once, reused for every query with that shape"""
+        status_shape, date_range, has_project_id = shape
+        clauses = []
+
+        # Status filter - several comma-separated statuses bind as one array parameter,
+        # so the SQL text does not depend on how many were given
+        if status_shape > 1:
+            status_col = cls._get_column_name(entity, 'status')
+            clauses.append(f"{alias}.{status_col} = ANY(%(statuses)s)")
+        elif status_shape == 1:
+            status_col = cls._get_column_name(entity, 'status')
+            clauses.append(f"{alias}.{status_col} = %(status)s")
 
         # Date range filter
-        if filters.date_range:
-            if filters.date_range == 'last_week':
-                sql += f" AND {alias}.{created_col} >= NOW() - INTERVAL '7 days'"
-            elif filters.date_range == 'last_month':
-                sql += f" AND {alias}.{created_col} >= NOW() - INTERVAL '30 days'"
-            elif filters.date_range == 'last_year':
-                sql += f" AND {alias}.{created_col} >= NOW() - INTERVAL '365 days'"
+        if date_range:
+            created_col = cls._get_column_name(entity, 'created_at')
+            clauses.append(f"{alias}.{created_col} >= NOW() - INTERVAL '{DATE_RANGE_INTERVALS[date_range]}'")
 
         # Project ID filter (for stages/objects/sections)
-        if filters.project_id:
-            schema = self.SCHEMA.get(entity)
-            if schema and 'project_id' in schema['columns']:
-                sql += f" AND {alias}.project_id = %(project_id)s"
-                params['project_id'] = filters.project_id
+        if has_project_id:
+            clauses.append(f"{alias}.project_id = %(project_id)s")
 
-        return sql, params
+        return tuple(clauses)
 
     def _apply_related_filters(
         self,
-        sql: str,
+        where: List[str],
         params: Dict,
         filters: FilterOptions,
         entities: List[str]
-    ) -> Tuple[str, Dict]:
+    ) -> None:
         """
         Apply filters on related entities (budget, hours, progress, etc.)
 
         Args:
-            sql: SQL query string
-            params: Query parameters
+            where: WHERE predicates, appended in place
+            params: Query parameters, updated in place
             filters: Filter options with numeric filters
             entities: List of entities in query
-
-        Returns:
-            Tuple of (sql, params) with filters applied
         """
         if not filters:
-            return sql, params
-
-        # Budget filters (if v_budgets_full is in entities)
-        if 'v_budgets_full' in entities:
-            if filters.min_budget is not None:
-                sql += f" AND b.total_amount >= %(min_budget)s"
-                params['min_budget'] = filters.min_budget
-
-            if filters.max_budget is not None:
-                sql += f" AND b.total_amount <= %(max_budget)s"
-                params['max_budget'] = filters.max_budget
-
-        # Hours filters (if view_project_dashboard is in entities)
-        if 'view_project_dashboard' in entities:
-            if filters.min_hours is not None:
-                sql += f" AND pd.hours_actual_total >= %(min_hours)s"
-                params['min_hours'] = filters.min_hours
-
-            if filters.max_hours is not None:
-                sql += f" AND pd.hours_actual_total <= %(max_hours)s"
-                params['max_hours'] = filters.max_hours
-
-        # Progress filters (on primary entity if it has progress column)
-        if filters.min_progress is not None:
-            # Try to apply on primary entity (objects, stages, sections have progress)
-            primary_entity = entities[0] if entities else None
-            if primary_entity in ['objects', 'stages', 'sections', 'decomposition_items']:
-                progress_col = self._get_column_name(primary_entity, 'progress')
-                alias = self.SCHEMA.get(primary_entity, {}).get('alias', 'p')
-                sql += f" AND {alias}.{progress_col} >= %(min_progress)s"
-                params['min_progress'] = filters.min_progress
-
-        if filters.max_progress is not None:
-            primary_entity = entities[0] if entities else None
-            if primary_entity in ['objects', 'stages', 'sections', 'decomposition_items']:
-                progress_col = self._get_column_name(primary_entity, 'progress')
-                alias = self.SCHEMA.get(primary_entity, {}).get('alias', 'p')
-                sql += f" AND {alias}.{progress_col} <= %(max_progress)s"
-                params['max_progress'] = filters.max_progress
-
-        return sql, params
+            return
+
+        bounds = {}
+
+        # Budget/hours filters (if v_budgets_full/view_project_dashboard is in entities)
+        for related_entity, column, min_field, max_field in self.RELATED_RANGE_FILTERS:
+            if related_entity in entities:
+                bounds[column] = (min_field, max_field)
+
+        # Progress filters (on primary entity if it has progress column: objects, stages, sections...)
+        primary_entity = entities[0] if entities else None
+        if primary_entity in self.PROGRESS_ENTITIES:
+            progress_col = self._get_column_name(primary_entity, 'progress')
+            alias = self.SCHEMA.get(primary_entity, {}).get('alias', 'p')
+            bounds[f"{alias}.{progress_col}"] = ('min_progress', 'max_progress')
+
+        new_params = {}
+        for column, (min_field, max_field) in bounds.items():
+            for field, operator in ((min_field, '>='), (max_field, '<=')):
+                value = getattr(filters, field)
+                if value is not None:
+                    where.append(f"{column} {operator} %({field})s")
+                    new_params[field] = value
+        params.update(new_params)
 
     def _apply_personalization(
         self,
-        sql: str,
+        where: List[str],
         params: Dict,
         entity: str,
         user_id: str,
         alias: str
-    ) -> Tuple[str, Dict]:
+    ) -> None:
         """
         Apply personalization filter when user asks for "my projects/tasks"
 
         Args:
-            sql: SQL query string
-            params: Query parameters dict
+            where: WHERE predicates, the filter is appended in place
+            params: Query parameters dict, updated in place
             entity: Entity name (projects, tasks, etc.)
             user_id: User ID for filtering
             alias: Table alias
-
-        Returns:
-            Tuple of (sql, params) with personalization applied
         """
-        personalization_filter = None
-
-        if entity == 'projects':
-            # Filter by project_manager
-            manager_col = self._get_column_name(entity, 'manager')
-            personalization_filter = f"{alias}.{manager_col} = %(user_id)s"
-
-        elif entity == 'objects':
-            # Filter by object_responsible
-            personalization_filter = f"{alias}.object_responsible = %(user_id)s"
-
-        elif entity == 'sections':
-            # Filter by section_responsible
-            personalization_filter = f"{alias}.section_responsible = %(user_id)s"
-
-        elif entity == 'tasks':
-            # Filter by task_responsible
-            personalization_filter = f"{alias}.task_responsible = %(user_id)s"
-
-        elif entity == 'stages':
-            # Filter stages by objects where user is responsible
-            personalization_filter = f"""EXISTS (
-                SELECT 1 FROM objects o
-                WHERE o.stage_id = {alias}.id
-                AND o.responsible_id = %(user_id)s
-            )"""
-
-        elif entity == 'decomposition_items':
-            # Via section responsible
-            personalization_filter = f"""EXISTS (
-                SELECT 1 FROM sections s
-                WHERE s.section_id = {alias}.decomposition_item_section_id
-                AND s.section_responsible = %(user_id)s
-            )"""
-
-        # Add filter to SQL
-        if personalization_filter:
-            sql += f" AND {personalization_filter}"
+        personalization_clause = self._personalization_clause(entity, alias)
+        if personalization_clause:
+            where.append(personalization_clause)
             params['user_id'] = user_id
 
-        return sql, params
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _personalization_clause(cls, entity: str, alias: str) -> Optional[str]:
+        """Build the "my projects/tasks" clause for an entity once; the user ID is bound as %(user_id)s"""
+        template = cls.PERSONALIZATION_TEMPLATES.get(entity)
+        if template is None:
+            return None
+
+        manager_col = cls._get_column_name(entity, 'manager')
+        return template.format(alias=alias, manager_col=manager_col)
 
     def _apply_rbac_filter(
         self,
-        sql: str,
+        where: List[str],
+        params: Dict,
         entity: str,
         user_role: str,
         user_id: Optional[str],
         alias: str
-    ) -> str:
-        """Inject RBAC WHERE clause based on user role"""
+    ) -> None:
+        """Append the RBAC WHERE predicate for the user role to where"""
+        clause, binds_user_id = self._rbac_clause(entity, user_role, bool(user_id), alias)
+        if clause:
+            where.append(clause)
+            if binds_user_id:
+                params['user_id'] = user_id
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _rbac_clause(
+        cls,
+        entity: str,
+        user_role: str,
+        has_user_id: bool,
+        alias: str
+    ) -> Tuple[Optional[str], bool]:
+        """
+        Build the RBAC clause for a role once; the user ID is bound as a parameter, not inlined
 
-        rbac_filter = None
+        Returns:
+            Tuple of (WHERE predicate or None, whether the predicate uses %(user_id)s)
+        """
 
+        rbac_filter = None
         # Use dynamic column name for status
-        status_col = self._get_column_name(entity, 'status')
+        status_col = cls._get_column_name(entity, 'status')
 
         if user_role == 'guest':
             # Most restrictive - only active/completed, no profiles
@@ -1208,7 +1501,7 @@ WHERE 1=1
             # Can see all except cancelled
             rbac_filter = f"{alias}.{status_col} != 'cancelled'"
 
-        elif user_role == 'engineer' and user_id:
+        elif user_role == 'engineer' and has_user_id:
             # Personalized - only user's assigned objects
             if entity == 'objects':
                 rbac_filter = f"{alias}.object_responsible = %(user_id)s"
@@ -1228,67 +1521,56 @@ WHERE 1=1
                     AND o.object_responsible = %(user_id)s
                 )"""
 
-        elif user_role in ['manager', 'admin']:
+        elif user_role in UNRESTRICTED_ROLES:
             # Full access - no additional filter
             pass
 
-        # Inject filter into SQL
-        if rbac_filter:
-            if 'WHERE' in sql.upper():
-                sql += f" AND {rbac_filter}"
-            else:
-                sql += f" WHERE {rbac_filter}"
-
-        return sql
+        if not rbac_filter:
+            return None, False
+        return rbac_filter, user_role == 'engineer'
 
     def _inject_parameters_safe(self, sql: str, params: Dict) -> str:
         """
         Inject parameters into SQL with SQL injection protection
 
-        Replaces %(param_name)s placeholders with escaped values
+        Replaces %(param_name)s placeholders with escaped values in a single pass,
+        so a value that itself contains placeholder text is never substituted again.
+        Placeholders without a parameter (or with an unsupported value type) are left as is.
         """
-        for key, value in params.items():
-            placeholder = f"%({key})s"
-
-            if isinstance(value, str):
-                # Escape single quotes (SQL standard: ' becomes '')
-                escaped = value.replace("'", "''")
-                sql = sql.replace(placeholder, f"'{escaped}'")
+        def substitute(match: re.Match) -> str:
+            key = match.group(1)
+            if key not in params:
+                return match.group(0)
+            literal = _sql_literal(params[key])
+            return match.group(0) if literal is None else literal
 
-            elif isinstance(value, (int, float)):
-                sql = sql.replace(placeholder, str(value))
-
-            elif value is None:
-                sql = sql.replace(placeholder, "NULL")
-
-            elif isinstance(value, bool):
-                sql = sql.replace(placeholder, 'TRUE' if value else 'FALSE')
-
-        return sql
+        return PLACEHOLDER_PATTERN.sub(substitute, sql)
 
+    @classmethod
+    @lru_cache(maxsize=256)
     def _build_auto_joins(
-        self,
+        cls,
         entity: str,
-        required_relations: List[str]
+        required_relations: FrozenSet[str]
     ) -> str:
         """
-        Build JOIN clauses based on SCHEMA relations
+        Build JOIN clauses based on SCHEMA relations (cached per entity and relation set)
 
         Args:
             entity: Main entity name
-            required_relations: List of relation names to join
+            required_relations: Relation names to join (frozenset, so the result can be cached)
 
         Returns:
             SQL JOIN clauses
         """
-        schema = self.SCHEMA.get(entity)
+        schema = cls.SCHEMA.get(entity)
         if not schema:
             return ""
 
         joins = []
         for rel_name, (rel_table, fk, pk) in schema.get('relations', {}).items():
             if rel_name in required_relations:
-                rel_schema = self.SCHEMA.get(rel_table)
+                rel_schema = cls.SCHEMA.get(rel_table)
                 if rel_schema:
                     rel_alias = rel_schema['alias']
                     joins.append(
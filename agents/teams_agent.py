@@ -11,13 +11,14 @@ Schema follows the Eneca corporate protocol template
 Caller-supplied metadata (author, location, transcript_url, previous_protocol_url)
 is attached after the LLM call so the model cannot hallucinate it.
 """
-from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from pydantic import BaseModel, Field, ConfigDict
-from agents.base import BaseAgent
+from agents.base import BaseAgent, load_prompt, PROMPTS_DIR
 from core.config import settings
 from loguru import logger
 
+PROMPT_PATH = PROMPTS_DIR / "teams_agent.md"
+
 
 # --- Input Models ---
 
@@ -144,11 +145,10 @@ class TeamsAgent(BaseAgent):
 
     def _get_default_prompt(self) -> str:
         """Load system prompt from prompts/teams_agent.md"""
-        prompt_path = Path(__file__).parent.parent / "prompts" / "teams_agent.md"
+        prompt_path = PROMPT_PATH
 
         try:
-            with open(prompt_path, "r", encoding="utf-8") as f:
-                prompt = f.read()
+            prompt = load_prompt(str(prompt_path))
             logger.debug(f"Loaded Teams agent prompt from {prompt_path}")
             return prompt
         except FileNotFoundError:
@@ -59,6 +59,8 @@ class AgentRegistry:
         self._agents: Dict[str, AgentConfig] = {}
         self._agent_instances: Dict[str, BaseAgent] = {}
         self._config_file = Path(__file__).parent.parent / "config" / "agents.yaml"
+        self._loaded_files: set = set()  # YAML files already loaded
+        self._tools: Optional[List[Callable]] = None  # Cached result of create_tools_for_agents
 
         logger.info("AgentRegistry initialized")
 
@@ -98,12 +100,14 @@ class AgentRegistry:
         )
 
         self._agents[name] = agent_config
+        self._tools = None
         logger.info(f"Registered agent: {name} (enabled={enabled}, priority={priority})")
 
     def unregister_agent(self, name: str) -> None:
         """Unregister an agent"""
         if name in self._agents:
             del self._agents[name]
+            self._tools = None
             if name in self._agent_instances:
                 del self._agent_instances[name]
             logger.info(f"Unregistered agent: {name}")
@@ -204,15 +208,23 @@ class AgentRegistry:
         # Sort by priority (higher priority first)
         return sorted(configs, key=lambda c: c.priority, reverse=True)
 
-    def load_from_yaml(self, config_path: Optional[Path] = None) -> None:
+    def load_from_yaml(self, config_path: Optional[Path] = None, force: bool = False) -> None:
         """
         Load agent configurations from YAML file
 
+        Loading is idempotent: a file that was already loaded is skipped
+        unless force=True.
+
         Args:
             config_path: Path to YAML config file (defaults to config/agents.yaml)
+            force: Re-read the file even if it was loaded before
         """
         config_path = config_path or self._config_file
 
+        if config_path in self._loaded_files and not force:
+            logger.debug(f"Agent config already loaded: {config_path}")
+            return
+
         if not config_path.exists():
             logger.warning(f"Agent config file not found: {config_path}")
             return
@@ -236,6 +248,7 @@ class AgentRegistry:
                     priority=agent_data.get('priority', 0)
                 )
 
+            self._loaded_files.add(config_path)
             logger.info(f"Loaded {len(data['agents'])} agents from {config_path}")
 
         except Exception as e:
@@ -245,17 +258,25 @@ class AgentRegistry:
         """
         Create LangChain tools for all enabled agents
 
+        The list is cached until an agent is registered or unregistered. It is
+        not cached if some agent failed to instantiate, so the next call retries it.
+
         Returns:
             List of tool functions
         """
-        from langchain_core.tools import tool
+        if self._tools is not None:
+            return self._tools
+
+        from langchain_core.tools import StructuredTool, tool
 
         tools = []
         configs = self.get_all_configs(enabled_only=True)
+        complete = True
 
         for agent_config in configs:
             agent_instance = self.get_agent(agent_config.name)
             if not agent_instance:
+                complete = False
                 continue
 
             # Create a closure to capture agent_instance
@@ -298,17 +319,47 @@ class AgentRegistry:
 
                 return tool_func
 
+            def make_async_tool_func(agent_inst, agent_name):
+                async def atool_func(query: str) -> str:
+                    """Async tool function - lets LangGraph run independent agent calls concurrently"""
+                    logger.info(f"🔧 TOOL CALLED (async): '{agent_name}' with query: '{query[:100]}...'")
+
+                    try:
+                        user_role = get_current_user_role()
+                        if 'user_role' in inspect.signature(agent_inst.answer_question_async).parameters:
+                            result = await agent_inst.answer_question_async(query, user_role=user_role)
+                        else:
+                            result = await agent_inst.answer_question_async(query)
+                        logger.info(f"🔧 TOOL RESULT from '{agent_name}': {len(result)} chars")
+                        return result
+                    except Exception as e:
+                        logger.error(f"Error in tool for agent '{agent_name}': {e}")
+                        return f"Ошибка при вызове агента '{agent_name}': {str(e)}"
+
+                return atool_func
+
             # Create tool with proper metadata
             tool_func = make_tool_func(agent_instance, agent_config.name)
             tool_func.__name__ = agent_config.name
             tool_func.__doc__ = agent_config.tool_description
 
-            # Decorate with @tool
-            tool_instance = tool(tool_func)
+            if hasattr(agent_instance, 'answer_question_async'):
+                # Sync + async implementation (used by invoke / ainvoke respectively)
+                tool_instance = StructuredTool.from_function(
+                    func=tool_func,
+                    coroutine=make_async_tool_func(agent_instance, agent_config.name),
+                    name=agent_config.name,
+                    description=agent_config.tool_description
+                )
+            else:
+                # Decorate with @tool
+                tool_instance = tool(tool_func)
             tools.append(tool_instance)
 
             logger.info(f"Created tool for agent: {agent_config.name}")
 
+        if complete:
+            self._tools = tools
         return tools
 
 
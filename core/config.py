@@ -76,6 +76,14 @@ class Settings(BaseSettings):
     max_agent_iterations: int = Field(5, alias="MAX_AGENT_ITERATIONS")
     agent_max_iterations: int = Field(10, alias="AGENT_MAX_ITERATIONS")
     agent_timeout: int = Field(300, alias="AGENT_TIMEOUT")
+    # Trace LangGraph steps and response structure (dev only - noisy and slow)
+    agent_verbose: bool = Field(False, alias="AGENT_VERBOSE")
+    # Max prompt tokens per orchestrator LLM call; oldest history is dropped beyond it
+    orchestrator_context_budget: int = Field(8000, alias="ORCHESTRATOR_CONTEXT_BUDGET")
+
+    # Analytics Configuration
+    # Route unfiltered default charts to materialized views (database/sql/analytics_chart_mviews.sql)
+    analytics_chart_mviews_enabled: bool = Field(False, alias="ANALYTICS_CHART_MVIEWS_ENABLED")
 
     # Embedding & Vector Store Configuration
     embedding_model: str = Field("text-embedding-3-small", alias="EMBEDDING_MODEL")
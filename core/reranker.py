@@ -4,6 +4,7 @@ Cohere Reranker for improving RAG search quality
 Reranks vector search results using Cohere's semantic reranking model.
 This improves relevance by using cross-encoder scoring instead of cosine similarity.
 """
+import asyncio
 from typing import List, Dict, Any, Optional
 from loguru import logger
 from core.config import settings
@@ -121,6 +122,25 @@ class CohereReranker:
             logger.error(f"Reranking failed: {e}, returning original documents")
             return documents[:top_n]
 
+    async def arerank(
+        self,
+        query: str,
+        documents: List[Dict[str, Any]],
+        top_n: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async version of rerank (sync Cohere client runs in a worker thread)
+
+        Args:
+            query: User's search query
+            documents: List of documents from vector search
+            top_n: Number of top results to return (defaults to config RERANK_TOP_N)
+
+        Returns:
+            Reranked list of documents with updated scores and relevance
+        """
+        return await asyncio.to_thread(self.rerank, query, documents, top_n)
+
     def _get_relevance_band(self, score: float) -> str:
         """
         Convert Cohere relevance score to relevance band.
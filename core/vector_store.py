@@ -1,4 +1,5 @@
 """Vector store module for Supabase integration"""
+import asyncio
 from typing import List, Optional, Tuple
 from langchain_community.vectorstores import SupabaseVectorStore
 from langchain_openai import OpenAIEmbeddings
@@ -171,6 +172,23 @@ class VectorStoreManager:
             logger.error(f"Error searching vector store with scores: {e}")
             return []
 
+    async def asearch_with_score(self, query: str, k: int = None, score_threshold: float = None) -> List[dict]:
+        """
+        Async version of search_with_score
+
+        The Supabase client is synchronous, so the search runs in a worker thread
+        to keep the event loop free while waiting on embeddings + pgvector.
+
+        Args:
+            query: Search query
+            k: Number of results to return (defaults to config value)
+            score_threshold: Minimum relevance score (defaults to config value)
+
+        Returns:
+            List of relevant documents with scores
+        """
+        return await asyncio.to_thread(self.search_with_score, query, k, score_threshold)
+
     def _validate_and_fix_encoding(self, text: str, doc_index: int) -> Tuple[str, bool]:
         """
         Validate and fix text encoding before upload
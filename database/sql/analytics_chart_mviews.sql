@@ -0,0 +1,66 @@
+-- Materialized views for common Analytics Agent charts
+-- Pre-aggregated "COUNT(*) GROUP BY group_by_column" for the default chart
+-- (pie/bar/line/area) without filters. SQLGenerator routes to these views when
+-- ANALYTICS_CHART_MVIEWS_ENABLED=true and the user role has full access.
+--
+-- Columns match the generated chart SQL: label, value
+
+-- Projects by status
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_projects_status_counts AS
+SELECT
+    p.project_status AS label,
+    COUNT(*) AS value
+FROM projects p
+GROUP BY p.project_status
+WITH DATA;
+
+-- Stages by project
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_stages_project_counts AS
+SELECT
+    s.stage_project_id AS label,
+    COUNT(*) AS value
+FROM stages s
+GROUP BY s.stage_project_id
+WITH DATA;
+
+-- Objects by responsible
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_objects_responsible_counts AS
+SELECT
+    o.object_responsible AS label,
+    COUNT(*) AS value
+FROM objects o
+GROUP BY o.object_responsible
+WITH DATA;
+
+-- Unique indexes are required for REFRESH ... CONCURRENTLY
+CREATE UNIQUE INDEX IF NOT EXISTS mv_projects_status_counts_label_idx
+    ON mv_projects_status_counts (label);
+CREATE UNIQUE INDEX IF NOT EXISTS mv_stages_project_counts_label_idx
+    ON mv_stages_project_counts (label);
+CREATE UNIQUE INDEX IF NOT EXISTS mv_objects_responsible_counts_label_idx
+    ON mv_objects_responsible_counts (label);
+
+-- Refresh function (non-blocking for readers)
+CREATE OR REPLACE FUNCTION refresh_analytics_chart_mviews()
+RETURNS VOID
+SECURITY DEFINER
+SET search_path = public
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_projects_status_counts;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_stages_project_counts;
+    REFRESH MATERIALIZED VIEW CONCURRENTLY mv_objects_responsible_counts;
+END;
+$$;
+
+GRANT SELECT ON mv_projects_status_counts, mv_stages_project_counts, mv_objects_responsible_counts
+    TO service_role;
+
+-- Schedule refresh every 10 minutes (requires pg_cron extension:
+-- Database -> Extensions -> pg_cron in Supabase dashboard)
+-- SELECT cron.schedule(
+--     'refresh-analytics-chart-mviews',
+--     '*/10 * * * *',
+--     'SELECT refresh_analytics_chart_mviews()'
+-- );
@@ -0,0 +1,90 @@
+"""Tests for AgentRegistry — YAML loading and tool caching"""
+import pytest
+
+from agents import BaseAgent
+from core.agent_registry import AgentRegistry
+
+
+AGENTS_YAML = """
+agents:
+  - name: echo_agent
+    class_path: agents.echo.EchoAgent  # instantiation is patched in tests
+    description: Echo
+    tool_description: Повторяет запрос
+"""
+
+
+class EchoAgent(BaseAgent):
+    """Minimal agent that never calls an LLM"""
+
+    def __init__(self):
+        pass
+
+    def _get_default_prompt(self) -> str:
+        return ""
+
+    def answer_question(self, question: str) -> str:
+        return question
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = AgentRegistry()
+    monkeypatch.setattr(registry, "_create_agent_instance", lambda agent_config: EchoAgent())
+    return registry
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "agents.yaml"
+    path.write_text(AGENTS_YAML, encoding="utf-8")
+    return path
+
+
+def test_load_from_yaml_is_idempotent(registry, config_file, monkeypatch):
+    registry.load_from_yaml(config_file)
+    monkeypatch.setattr(registry, "register_agent", lambda **kwargs: pytest.fail("YAML re-read"))
+
+    registry.load_from_yaml(config_file)
+
+    assert registry.list_agents() == ["echo_agent"]
+
+
+def test_load_from_yaml_force_reloads(registry, config_file):
+    registry.load_from_yaml(config_file)
+    registry.unregister_agent("echo_agent")
+
+    registry.load_from_yaml(config_file, force=True)
+
+    assert registry.list_agents() == ["echo_agent"]
+
+
+def test_tools_are_cached(registry, config_file):
+    registry.load_from_yaml(config_file)
+
+    tools = registry.create_tools_for_agents()
+
+    assert registry.create_tools_for_agents() is tools
+    assert [t.name for t in tools] == ["echo_agent"]
+    assert tools[0].invoke({"query": "привет"}) == "привет"
+
+
+def test_register_agent_invalidates_tools(registry, config_file):
+    registry.load_from_yaml(config_file)
+    tools = registry.create_tools_for_agents()
+
+    registry.register_agent("second_agent", "x.Y", "Second", "Второй агент")
+
+    assert [t.name for t in registry.create_tools_for_agents()] == ["echo_agent", "second_agent"]
+    assert registry.create_tools_for_agents() is not tools
+
+
+def test_failed_agent_is_retried(registry, config_file, monkeypatch):
+    registry.load_from_yaml(config_file)
+    monkeypatch.setattr(registry, "get_agent", lambda name: None)
+    assert registry.create_tools_for_agents() == []
+
+    monkeypatch.undo()
+    monkeypatch.setattr(registry, "_create_agent_instance", lambda agent_config: EchoAgent())
+
+    assert [t.name for t in registry.create_tools_for_agents()] == ["echo_agent"]
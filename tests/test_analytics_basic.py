@@ -96,6 +96,19 @@ class TestAnalyticsAgent:
         assert config["type"] == "bar"
         assert "scales" in config["options"]
 
+    def test_prepare_chart_mixed_row_keys(self, agent):
+        """Test chart rows with fallback keys (name/count) and missing keys"""
+        data = [
+            {"name": "active", "count": 3},
+            {"label": "completed", "value": 5},
+            {}
+        ]
+
+        config = agent._prepare_chart_data(data, "pie")
+
+        assert config["data"]["labels"] == ["active", "completed", "Unknown"]
+        assert config["data"]["datasets"][0]["data"] == [3, 5, 0]
+
     def test_process_analytics_returns_result(self, agent):
         """Test full analytics processing pipeline"""
         result = agent.process_analytics(
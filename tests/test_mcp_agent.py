@@ -0,0 +1,386 @@
+"""Tests for MCPAgent — JSON-RPC transport and response formatting.
+
+The MCP server is replaced by an httpx.MockTransport; no real network or
+OpenAI calls are made.
+"""
+import json
+
+import httpx
+import pytest
+from langchain_core.messages import AIMessage
+
+from agents.mcp_agent import MAX_FORMATTED_ITEMS, MCPAgent
+
+
+MCP_URL = "http://mcp.test/rpc"
+
+TOOLS = [
+    {
+        "name": "search_projects",
+        "description": "Список проектов",
+        "inputSchema": {"properties": {"status": {"type": "string"}}, "required": []},
+    },
+]
+
+
+def _make_agent(handler, cache_dir):
+    """Construct an MCPAgent whose HTTP clients talk to `handler` instead of the network."""
+    agent = MCPAgent(mcp_url=MCP_URL)
+    agent._tools_cache_path = cache_dir / "mcp_tools.json"
+    agent._client.close()
+    agent._client = httpx.Client(transport=httpx.MockTransport(handler))
+    agent._create_async_transport = lambda: httpx.MockTransport(handler)
+    return agent
+
+
+@pytest.fixture
+def requests_seen():
+    return []
+
+
+@pytest.fixture
+def handler(requests_seen):
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        requests_seen.append(payload)
+        if payload["method"] == "tools/list":
+            return httpx.Response(200, json={"jsonrpc": "2.0", "id": payload["id"], "result": {"tools": TOOLS}})
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": payload["id"], "result": "ok"})
+
+    return handler
+
+
+@pytest.fixture
+def agent(handler, tmp_path):
+    agent = _make_agent(handler, tmp_path)
+    yield agent
+    agent.close()
+
+
+# --- Transport ---
+
+
+def test_requests_share_one_client(agent, requests_seen):
+    client = agent._client
+
+    agent._make_jsonrpc_request("tools/list")
+    agent._make_jsonrpc_request("tools/call", {"name": "search_projects", "arguments": {}})
+
+    assert agent._client is client
+    assert [r["method"] for r in requests_seen] == ["tools/list", "tools/call"]
+    assert [r["id"] for r in requests_seen] == [1, 2]
+
+
+def test_http_error_is_reported_as_jsonrpc_error(tmp_path):
+    agent = _make_agent(lambda request: httpx.Response(503), tmp_path)
+
+    response = agent._make_jsonrpc_request("tools/list")
+
+    assert response["error"]["code"] == -32001
+    assert "503" in response["error"]["message"]
+
+
+def test_connect_error_is_retried(tmp_path):
+    attempts = []
+
+    def flaky(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise httpx.ConnectError("connection reset", request=request)
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": 1, "result": "ok"})
+
+    agent = _make_agent(flaky, tmp_path)
+
+    assert agent._make_jsonrpc_request("tools/call", {"name": "search_projects"})["result"] == "ok"
+    assert len(attempts) == 2
+
+
+def test_tools_call_not_retried_after_read_timeout(tmp_path):
+    attempts = []
+
+    def slow(request: httpx.Request) -> httpx.Response:
+        attempts.append(request)
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    agent = _make_agent(slow, tmp_path)
+
+    assert agent._make_jsonrpc_request("tools/call", {"name": "create_project"})["error"]["code"] == -32000
+    assert len(attempts) == 1
+
+    assert agent._make_jsonrpc_request("tools/list")["error"]["code"] == -32000
+    assert len(attempts) == 1 + agent.MAX_ATTEMPTS
+
+
+def test_close_closes_client(agent):
+    agent.close()
+
+    assert agent._client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_acall_tools_runs_all_calls(agent, requests_seen):
+    responses = await agent.acall_tools([
+        {"tool_name": "search_projects", "arguments": {"status": "active"}},
+        {"tool_name": "search_projects"},
+    ])
+
+    assert [r["result"] for r in responses] == ["ok", "ok"]
+    assert sorted(r["params"]["arguments"].get("status", "") for r in requests_seen) == ["", "active"]
+
+
+@pytest.mark.asyncio
+async def test_aget_available_tools_is_cached(agent, requests_seen):
+    assert await agent.aget_available_tools() == TOOLS
+    assert await agent.aget_available_tools() == TOOLS
+    assert len(requests_seen) == 1
+
+
+def test_async_client_follows_event_loop(agent):
+    import asyncio
+
+    first = asyncio.run(agent._make_jsonrpc_request_async("tools/call", {"name": "search_projects"}))
+    first_client = agent._aclient
+    second = asyncio.run(agent._make_jsonrpc_request_async("tools/call", {"name": "search_projects"}))
+
+    assert first["result"] == second["result"] == "ok"
+    assert agent._aclient is not first_client
+
+    agent.close()
+
+    assert agent._aclient is None
+
+
+# --- Tools cache ---
+
+
+def test_tools_list_persisted_across_instances(agent, handler, tmp_path, requests_seen):
+    assert agent.get_available_tools() == TOOLS
+    description = agent._build_tools_description()
+
+    fresh = _make_agent(handler, tmp_path)
+    assert fresh.get_available_tools() == TOOLS
+    assert fresh._build_tools_description() == description
+    assert len(requests_seen) == 1
+    fresh.close()
+
+
+def test_expired_disk_cache_is_refetched(agent, handler, tmp_path, requests_seen):
+    agent.get_available_tools()
+
+    fresh = _make_agent(handler, tmp_path)
+    fresh.TOOLS_CACHE_TTL = -1
+    fresh.get_available_tools()
+    assert len(requests_seen) == 2
+    fresh.close()
+
+
+# --- Tool call parsing ---
+
+
+class _FakeToolLLM:
+    """Stands in for ChatOpenAI: records bound tools, answers with a fixed AIMessage."""
+
+    def __init__(self, message):
+        self.message = message
+        self.bound_tools = None
+
+    def bind_tools(self, tools, **kwargs):
+        self.bound_tools = tools
+        return self
+
+    def invoke(self, messages):
+        return self.message
+
+
+def test_parse_tool_call_uses_function_calling(agent):
+    fake = _FakeToolLLM(AIMessage(content="", tool_calls=[
+        {"name": "search_projects", "args": {"status": "active"}, "id": "call_1"}
+    ]))
+    agent.llm = fake
+
+    result = agent._parse_tool_call("Покажи активные проекты")
+
+    assert result == {"tool_name": "search_projects", "arguments": {"status": "active"}}
+    assert fake.bound_tools[0]["function"]["name"] == "search_projects"
+    assert fake.bound_tools[0]["function"]["parameters"]["type"] == "object"
+
+
+def test_parse_tool_call_without_tool_calls_returns_none(agent):
+    agent.llm = _FakeToolLLM(AIMessage(content="Не понимаю запрос"))
+
+    assert agent._parse_tool_call("Какая погода?") is None
+
+
+class _FailingLLM:
+    def bind_tools(self, tools, **kwargs):
+        raise AssertionError("LLM must not be used on the trigger fast path")
+
+
+@pytest.mark.parametrize("message", ["Покажи все проекты", "  покажи   проекты! ", "Какие есть проекты?"])
+def test_trigger_fast_path_skips_llm(agent, message):
+    agent.llm = _FailingLLM()
+
+    assert agent._parse_tool_call(message) == {"tool_name": "search_projects", "arguments": {}}
+
+
+def test_trigger_ignores_tools_missing_on_server(agent):
+    agent.get_available_tools()
+
+    assert agent._match_trigger("покажи этапы") is None
+
+
+def test_compile_triggers_skips_invalid_patterns(tmp_path):
+    from agents.mcp_agent import _compile_triggers
+
+    path = tmp_path / "triggers.yaml"
+    path.write_text(
+        "triggers:\n"
+        "  get-project-list:\n    - \"список проектов\"\n"
+        "  broken_tool:\n    - \"(незакрытая\"\n",
+        encoding="utf-8",
+    )
+
+    pattern, tool_names = _compile_triggers(path)
+
+    assert tool_names[pattern.fullmatch("список проектов").lastgroup] == "get-project-list"
+    assert list(tool_names.values()) == ["get-project-list"]
+
+
+# --- Local validation ---
+
+
+def test_unknown_tool_rejected_without_rpc(agent, requests_seen):
+    agent.get_available_tools()
+
+    response = agent._call_mcp_tool("drop_everything", {})
+
+    assert response["error"]["code"] == -32601
+    assert [r["method"] for r in requests_seen] == ["tools/list", "tools/list"]  # load + one refresh
+
+
+def test_unknown_tool_refreshes_stale_tools_list(agent, requests_seen):
+    agent.get_available_tools()
+    TOOLS.append({"name": "new_tool", "inputSchema": {"required": []}})
+    try:
+        response = agent._call_mcp_tool("new_tool", {})
+    finally:
+        TOOLS.pop()
+
+    assert response["result"] == "ok"
+    assert [r["method"] for r in requests_seen] == ["tools/list", "tools/list", "tools/call"]
+    assert "new_tool" in agent._tools_by_name
+
+
+def test_missing_required_argument_rejected_without_rpc(agent, requests_seen):
+    agent.get_available_tools()
+    agent._tools_by_name["search_projects"]["inputSchema"]["required"] = ["status"]
+
+    response = agent._call_mcp_tool("search_projects", {})
+
+    assert response["error"]["code"] == -32602
+    assert "status" in response["error"]["message"]
+    assert len(requests_seen) == 1
+
+
+@pytest.mark.parametrize("response", [
+    '```json\n{"tool_name": "search_projects", "arguments": {}}\n```',
+    '```\n{"tool_name": "search_projects", "arguments": {}}\n```\nГотово.',
+    '```json {"tool_name": "search_projects", "arguments": {}}',
+    '{"tool_name": "search_projects", "arguments": {}}',
+])
+def test_parse_llm_response_strips_markdown_fence(agent, response):
+    assert agent._parse_llm_response(response) == {"tool_name": "search_projects", "arguments": {}}
+
+
+# --- Formatting ---
+
+
+def test_format_list(agent):
+    text = agent._format_list([{"name": "Проект А", "id": "1", "status": "active"}], "search_projects")
+
+    assert text.startswith("Найдено элементов: 1")
+    assert "1. **Проект А**" in text
+    assert "   - status: active" in text
+    assert "id:" not in text
+
+
+def test_format_empty_list(agent):
+    assert agent._format_list([], "search_projects") == "Ничего не найдено."
+
+
+def test_format_large_list_is_truncated(agent):
+    items = [{"name": f"Проект {i}"} for i in range(MAX_FORMATTED_ITEMS + 3)]
+
+    text = agent._format_list(items, "search_projects")
+
+    assert text.startswith(f"Найдено элементов: {MAX_FORMATTED_ITEMS + 3}")
+    assert f"{MAX_FORMATTED_ITEMS}. **Проект {MAX_FORMATTED_ITEMS - 1}**" in text
+    assert f"**Проект {MAX_FORMATTED_ITEMS}**" not in text
+    assert text.endswith("... и ещё 3 элементов")
+
+
+# --- Batch ---
+
+
+def _batch_handler(posts):
+    def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        posts.append(payload)
+        if isinstance(payload, list):
+            # Answer in reverse order - client must match by id
+            return httpx.Response(200, json=[
+                {"jsonrpc": "2.0", "id": item["id"], "result": item["params"]["name"]}
+                for item in reversed(payload)
+            ])
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": payload["id"], "result": payload["params"]["name"]})
+    return handler
+
+
+def test_call_tools_sends_one_batch(tmp_path):
+    posts = []
+    agent = _make_agent(_batch_handler(posts), tmp_path)
+
+    responses = agent.call_tools([
+        {"tool_name": "search_projects", "arguments": {}},
+        {"tool_name": "search_stages", "arguments": {}},
+    ])
+
+    assert [r["result"] for r in responses] == ["search_projects", "search_stages"]
+    assert len(posts) == 1
+    assert agent._batch_supported is True
+
+
+def test_batch_falls_back_when_unsupported(tmp_path):
+    posts = []
+
+    def no_batch(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        posts.append(payload)
+        if isinstance(payload, list):
+            return httpx.Response(400)
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": payload["id"], "result": "ok"})
+
+    agent = _make_agent(no_batch, tmp_path)
+    calls = [("tools/call", {"name": "a"}), ("tools/call", {"name": "b"})]
+
+    assert [r["result"] for r in agent._make_jsonrpc_batch(calls)] == ["ok", "ok"]
+    assert agent._batch_supported is False
+
+    agent._make_jsonrpc_batch(calls)
+    assert sum(isinstance(p, list) for p in posts) == 1
+
+
+def test_batch_tool_calls_not_replayed_after_unexpected_reply(tmp_path):
+    posts = []
+
+    def odd_batch(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        posts.append(payload)
+        return httpx.Response(200, json={"jsonrpc": "2.0", "id": None, "result": "done"})
+
+    agent = _make_agent(odd_batch, tmp_path)
+    calls = [("tools/call", {"name": "a"}), ("tools/call", {"name": "b"})]
+
+    assert all("error" in r for r in agent._make_jsonrpc_batch(calls))
+    assert len(posts) == 1
+    assert agent._batch_supported is False
@@ -0,0 +1,174 @@
+"""Tests for OrchestratorAgent message flow — fake chat model, no OpenAI calls"""
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from agents.orchestrator import (
+    MAX_HISTORY_MESSAGES,
+    RECENT_TOOL_RESULTS,
+    OrchestratorAgent,
+    _compact_tool_results,
+    _trim_history,
+)
+
+
+class RecordingChatModel(FakeMessagesListChatModel):
+    """Fake chat model that records the messages it was called with"""
+
+    calls: list = []
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, *args, **kwargs):
+        self.calls.append([(m.type, m.content) for m in messages])
+        return super()._generate(messages, *args, **kwargs)
+
+
+@pytest.fixture
+def orchestrator():
+    agent = OrchestratorAgent.__new__(OrchestratorAgent)
+    agent.llm = RecordingChatModel(responses=[AIMessage(content="первый"), AIMessage(content="второй")], calls=[])
+    agent.tools = []
+    agent.system_prompt = "Системный промпт"
+    agent.checkpointer = InMemorySaver()
+    agent.agent = agent._setup_agent(agent.checkpointer)
+    return agent
+
+
+def test_process_message_reuses_compiled_agent(orchestrator, monkeypatch):
+    import langgraph.prebuilt
+
+    monkeypatch.setattr(langgraph.prebuilt, "create_react_agent",
+                        lambda *args, **kwargs: pytest.fail("graph rebuilt per message"))
+
+    assert orchestrator.process_message("привет", thread_id="t1") == "первый"
+
+
+def test_compiled_agents_cache_is_bounded(orchestrator):
+    from agents.orchestrator import MAX_COMPILED_AGENTS, _compiled_agents
+
+    for _ in range(MAX_COMPILED_AGENTS + 2):
+        orchestrator.checkpointer = InMemorySaver()
+        orchestrator._setup_agent(orchestrator.checkpointer)
+
+    assert len(_compiled_agents) == MAX_COMPILED_AGENTS
+    assert orchestrator._setup_agent(orchestrator.checkpointer) is next(reversed(_compiled_agents.values()))
+
+
+def test_user_context_prompt_is_not_persisted(orchestrator, monkeypatch):
+    monkeypatch.setattr(orchestrator, "_format_user_context", lambda user_context: "Контекст пользователя")
+
+    orchestrator.process_message("привет", thread_id="t1", user_context={"role_name": "admin"})
+    orchestrator.process_message("ещё", thread_id="t1")
+
+    first, second = orchestrator.llm.calls
+    assert first == [("system", "Системный промпт\n\nКонтекст пользователя"), ("human", "привет")]
+    assert second == [
+        ("system", "Системный промпт"),
+        ("human", "привет"),
+        ("ai", "первый"),
+        ("human", "ещё"),
+    ]
+
+
+def test_user_context_not_in_checkpoint_metadata(orchestrator):
+    orchestrator.process_message("привет", thread_id="t1",
+                                 user_context={"email": "secret@example.com", "role_name": "admin"})
+
+    checkpoints = list(orchestrator.checkpointer.list({"configurable": {"thread_id": "t1"}}))
+    assert checkpoints
+    for checkpoint in checkpoints:
+        assert "secret@example.com" not in str(checkpoint.metadata)
+        assert "Системный промпт" not in str(checkpoint.metadata)
+        assert "system_prompt_tokens" not in str(checkpoint.metadata)
+
+
+def test_caller_config_is_not_modified(orchestrator):
+    config = {"configurable": {"custom": 1}}
+
+    orchestrator.process_message("привет", thread_id="t1", config=config,
+                                 user_context={"email": "secret@example.com", "role_name": "admin"})
+    orchestrator.process_message("ещё", thread_id="t1", config=config)
+
+    assert config == {"configurable": {"custom": 1}}
+    assert orchestrator.llm.calls[-1][0] == ("system", "Системный промпт")
+
+
+def test_format_user_context(orchestrator):
+    from core.rbac import rbac_manager
+
+    text = orchestrator._format_user_context({"first_name": "Иван", "last_name": "Петров", "role_name": "guest"})
+
+    lines = text.split("\n")
+    assert lines[:4] == ["=== КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ ===", "Имя пользователя: Иван Петров", "Роль: guest",
+                         "=== КОНЕЦ КОНТЕКСТА ==="]
+    restrictions = rbac_manager.get_soft_restrictions("guest")
+    assert text.endswith(f"\n\n=== ОГРАНИЧЕНИЯ ДОСТУПА ===\n{restrictions}\n=== КОНЕЦ ОГРАНИЧЕНИЙ ===")
+
+    admin_text = orchestrator._format_user_context({"role_name": "admin"})
+    assert admin_text == "=== КОНТЕКСТ ПОЛЬЗОВАТЕЛЯ ===\nРоль: admin\n=== КОНЕЦ КОНТЕКСТА ==="
+
+
+def test_long_history_is_trimmed(orchestrator):
+    orchestrator.llm.responses = [AIMessage(content=str(i)) for i in range(MAX_HISTORY_MESSAGES)]
+
+    for i in range(MAX_HISTORY_MESSAGES // 2 + 1):
+        orchestrator.process_message(f"сообщение {i}", thread_id="t1")
+
+    last_call = orchestrator.llm.calls[-1]
+    assert last_call[0] == ("system", "Системный промпт")
+    assert len(last_call) - 1 <= MAX_HISTORY_MESSAGES
+    assert last_call[1][0] == "human"
+    assert last_call[-1] == ("human", f"сообщение {MAX_HISTORY_MESSAGES // 2}")
+
+
+def test_trim_history_drops_oldest_turns_over_budget():
+    pasted = HumanMessage(content="документ " * 5000)
+    messages = [pasted, AIMessage(content="Прочитал"), HumanMessage(content="Кратко?"), AIMessage(content="Да")]
+
+    assert _trim_history(messages, 1000) == messages[2:]
+    assert _trim_history(messages, 100_000) is messages
+
+
+def test_trim_history_keeps_oversized_latest_turn():
+    messages = [HumanMessage(content="Привет"), AIMessage(content="Здравствуйте"),
+                HumanMessage(content="документ " * 5000)]
+
+    assert _trim_history(messages, 1000) == messages[2:]
+
+
+def test_stream_message_yields_answer_and_keeps_history(orchestrator):
+    chunks = list(orchestrator.stream_message("привет", thread_id="t1"))
+
+    assert "".join(chunks) == "первый"
+    assert orchestrator.process_message("ещё", thread_id="t1") == "второй"
+    assert orchestrator.llm.calls[-1][1:] == [("human", "привет"), ("ai", "первый"), ("human", "ещё")]
+
+
+def test_compact_tool_results_keeps_recent_and_current_turn():
+    def turn(n):
+        return [
+            HumanMessage(content=f"вопрос {n}"),
+            AIMessage(content="", tool_calls=[{"name": "rag_agent", "args": {"query": "q"}, "id": f"call_{n}"}]),
+            ToolMessage(content=f"документ {n} " * 100, tool_call_id=f"call_{n}"),
+            AIMessage(content=f"ответ {n}"),
+        ]
+
+    messages = turn(0) + turn(1) + turn(2) + turn(3)[:3]
+
+    compacted = _compact_tool_results(messages)
+
+    tool_contents = [m.content for m in compacted if m.type == "tool"]
+    assert tool_contents[0].startswith("[Ранее полученный результат (")
+    assert tool_contents[0].endswith("...]")
+    assert compacted[2].tool_call_id == "call_0"
+    assert tool_contents[-RECENT_TOOL_RESULTS - 1:] == [m.content for m in messages if m.type == "tool"][-3:]
+    assert messages[2].content == "документ 0 " * 100  # state not modified
+
+
+def test_compact_tool_results_noop_returns_same_list():
+    messages = [HumanMessage(content="привет"), AIMessage(content="здравствуйте")]
+
+    assert _compact_tool_results(messages) is messages
@@ -0,0 +1,98 @@
+"""Tests for RAGAgent search flow — fake vector store, no Supabase/OpenAI calls"""
+import pytest
+
+from agents.rag_agent import RAGAgent, SearchStatus
+
+
+class FakeVectorStore:
+    def __init__(self, documents=None, available=True):
+        self.documents = documents or []
+        self.available = available
+
+    def is_available(self):
+        return self.available
+
+    def search_with_score(self, query, k):
+        return self.documents[:k]
+
+
+@pytest.fixture
+def rag_agent(monkeypatch):
+    from core.reranker import reranker
+
+    monkeypatch.setattr(reranker, "is_available", lambda: False)
+    agent = RAGAgent()
+    agent.vector_store = FakeVectorStore()
+    return agent
+
+
+def test_search_statuses(rag_agent):
+    assert rag_agent._search("вопрос")[0] is SearchStatus.EMPTY
+
+    rag_agent.vector_store.available = False
+    assert rag_agent._search("вопрос")[0] is SearchStatus.UNAVAILABLE
+
+
+def test_answer_uses_context_containing_error_words(rag_agent, monkeypatch):
+    rag_agent.vector_store.documents = [
+        {"content": "Ошибка монтажа не найдена в журнале", "score": 0.9, "relevance": "high"},
+    ]
+    prompts = []
+    monkeypatch.setattr(rag_agent, "invoke", lambda prompt: prompts.append(prompt) or "Ответ")
+
+    assert rag_agent.answer_question("Что в журнале?") == "Ответ"
+    assert "Ошибка монтажа не найдена в журнале" in prompts[0]
+
+
+def test_answer_returns_message_when_nothing_found(rag_agent, monkeypatch):
+    monkeypatch.setattr(rag_agent, "invoke", lambda prompt: pytest.fail("LLM called without context"))
+
+    assert rag_agent.answer_question("вопрос") == rag_agent.search_knowledge_base("вопрос")
+
+
+def test_search_formats_documents(rag_agent):
+    rag_agent.vector_store.documents = [
+        {"content": "Первый документ", "score": 0.91, "relevance": "high"},
+        {"content": "Второй документ\n", "score": 0.5, "relevance": "medium"},
+    ]
+
+    status, context = rag_agent._search("вопрос")
+
+    assert status is SearchStatus.OK
+    assert context == (
+        "Найденная информация:\n\n"
+        "[Документ 1] (релевантность: high, vector: 0.91)\nПервый документ\n\n"
+        "[Документ 2] (релевантность: medium, vector: 0.50)\nВторой документ"
+    )
+
+
+@pytest.mark.asyncio
+async def test_answer_question_async(rag_agent, monkeypatch):
+    rag_agent.vector_store.documents = [{"content": "Документ", "score": 0.9, "relevance": "high"}]
+
+    async def asearch_with_score(query, k):
+        return rag_agent.vector_store.search_with_score(query, k)
+
+    async def ainvoke(prompt):
+        return f"Ответ ({len(prompt)})"
+
+    rag_agent.vector_store.asearch_with_score = asearch_with_score
+    monkeypatch.setattr(rag_agent, "ainvoke", ainvoke)
+    monkeypatch.setattr(rag_agent, "invoke", lambda prompt: f"Ответ ({len(prompt)})")
+
+    assert await rag_agent.answer_question_async("вопрос") == rag_agent.answer_question("вопрос")
+
+
+def test_search_formats_reranked_documents(rag_agent, monkeypatch):
+    from core.reranker import reranker
+
+    rag_agent.vector_store.documents = [{"content": "Документ", "score": 0.5, "relevance": "medium"}]
+    monkeypatch.setattr(reranker, "is_available", lambda: True)
+    monkeypatch.setattr(reranker, "rerank", lambda query, documents, top_n: [
+        dict(doc, score=0.8766, relevance="high", reranked=True) for doc in documents
+    ])
+
+    status, context = rag_agent._search("вопрос")
+
+    assert status is SearchStatus.OK
+    assert context == "Найденная информация:\n\n[Документ 1] (релевантность: high, rerank: 0.877)\nДокумент"
@@ -0,0 +1,339 @@
+"""Tests for SQLGenerator — SQL text and parameters, no database involved"""
+import pytest
+
+from agents.analytics_models import AnalyticsQuery, FilterOptions
+from agents.sql_generator import SQLGenerator
+
+
+@pytest.fixture
+def generator():
+    return SQLGenerator()
+
+
+class TestColumnNames:
+    """Logical -> actual column name resolution"""
+
+    @pytest.mark.parametrize("entity, logical, expected", [
+        ("projects", "status", "project_status"),
+        ("tasks", "section_id", "task_parent_section"),
+        ("v_budgets_full", "created_at", "budget_id"),
+        ("stages", "unknown", "unknown"),
+        ("profiles", "user_id", "user_id"),
+        ("unknown_entity", "project_name", "project_name"),
+        ("project", "status", "project_status"),
+        ("view_my_work_analytics", "status", "status"),
+    ])
+    def test_get_column_name(self, generator, entity, logical, expected):
+        assert generator._get_column_name(entity, logical) == expected
+
+    def test_schema_is_read_only(self):
+        with pytest.raises(TypeError):
+            SQLGenerator.SCHEMA['projects']['alias'] = 'x'
+        with pytest.raises(TypeError):
+            SQLGenerator.COLUMN_MAPS['projects']['name'] = 'x'
+        assert isinstance(SQLGenerator.SCHEMA['projects']['columns'], tuple)
+
+
+class TestFilterSpecialization:
+    """Filters with the same shape share one cached SQL fragment"""
+
+    def test_single_status(self, generator):
+        query = AnalyticsQuery(intent="report", entities=["projects"],
+                               filters=FilterOptions(status="active"))
+        sql, params = generator.generate_sql(query, "admin", None)
+
+        assert "p.project_status = %(status)s" in sql
+        assert params == {"status": "active"}
+
+    def test_multiple_statuses(self, generator):
+        query = AnalyticsQuery(intent="report", entities=["projects"],
+                               filters=FilterOptions(status="active, paused"))
+        sql, params = generator.generate_sql(query, "admin", None)
+
+        assert "p.project_status = ANY(%(statuses)s)" in sql
+        assert params == {"statuses": ["active", "paused"]}
+
+    def test_status_count_does_not_change_sql(self, generator):
+        sqls = set()
+        for statuses in ("a, b", "a, b, c, d"):
+            query = AnalyticsQuery(intent="report", entities=["projects"], filters=FilterOptions(status=statuses))
+            sqls.add(generator.generate_sql(query, "admin", None)[0])
+
+        assert len(sqls) == 1
+
+    def test_injected_status_array_is_escaped(self, generator):
+        sql = generator._inject_parameters_safe("x = ANY(%(statuses)s)", {"statuses": ["a", "o'k", 'q"\\']})
+
+        # Untyped array literal: coerced to the column type (enum, uuid), unlike ARRAY['a'] (text[])
+        assert sql == """x = ANY('{"a","o''k","q\\"\\\\"}')"""
+
+
+class TestParameterInjection:
+    """Placeholders are replaced by escaped literals in one pass"""
+
+    def test_literal_types(self, generator):
+        sql = generator._inject_parameters_safe(
+            "%(s)s %(i)s %(b)s %(n)s %(missing)s",
+            {"s": "it's", "i": 5, "b": True, "n": None},
+        )
+
+        assert sql == "'it''s' 5 TRUE NULL %(missing)s"
+
+    def test_value_with_placeholder_text_is_not_reinjected(self, generator):
+        sql = generator._inject_parameters_safe(
+            "a = %(status)s AND b = %(user_id)s",
+            {"status": "%(user_id)s", "user_id": "u-1"},
+        )
+
+        assert sql == "a = '%(user_id)s' AND b = 'u-1'"
+
+    def test_date_range_and_project_id(self, generator):
+        query = AnalyticsQuery(intent="report", entities=["projects"],
+                               filters=FilterOptions(date_range="last_week", project_id="p-1"))
+        sql, params = generator.generate_sql(query, "admin", None)
+
+        assert "p.project_created >= NOW() - INTERVAL '7 days'" in sql
+        assert "p.project_id = %(project_id)s" in sql
+        assert params == {"project_id": "p-1"}
+
+    def test_project_id_ignored_for_entity_without_column(self, generator):
+        query = AnalyticsQuery(intent="report", entities=["stages"],
+                               filters=FilterOptions(project_id="p-1"))
+        sql, params = generator.generate_sql(query, "admin", None)
+
+        assert "%(project_id)s" not in sql
+        assert params == {}
+
+    def test_same_shape_reuses_fragment(self, generator):
+        for status in ("active", "paused"):
+            query = AnalyticsQuery(intent="report", entities=["projects"],
+                                   filters=FilterOptions(status=status))
+            _, params = generator.generate_sql(query, "admin", None)
+            assert params == {"status": status}
+
+        shape = generator._filter_shape(FilterOptions(status="done"), "projects")
+        first = generator._build_filter_clauses("projects", "p", shape)
+        assert generator._build_filter_clauses("projects", "p", shape) is first
+
+
+class TestChartMaterializedViews:
+    """Unfiltered default charts are served from pre-aggregated views when enabled"""
+
+    @pytest.fixture
+    def mviews_enabled(self, monkeypatch):
+        from core.config import settings
+        monkeypatch.setattr(settings, "analytics_chart_mviews_enabled", True)
+
+    def test_routes_to_mview(self, generator, mviews_enabled):
+        query = AnalyticsQuery(intent="chart", entities=["projects"], metrics=["count"], chart_type="pie")
+        sql, params = generator.generate_sql(query, "admin", None)
+
+        assert "FROM mv_projects_status_counts" in sql
+        assert params == {}
+
+    def test_filters_use_base_table(self, generator, mviews_enabled):
+        query = AnalyticsQuery(intent="chart", entities=["projects"], metrics=["count"], chart_type="pie",
+                               filters=FilterOptions(status="active"))
+        sql, _ = generator.generate_sql(query, "admin", None)
+
+        assert "mv_" not in sql
+        assert "FROM projects p" in sql
+
+    def test_restricted_role_uses_base_table(self, generator, mviews_enabled):
+        query = AnalyticsQuery(intent="chart", entities=["projects"], metrics=["count"], chart_type="pie")
+        sql, _ = generator.generate_sql(query, "guest", None)
+
+        assert "mv_" not in sql
+
+    def test_disabled_by_default(self, generator):
+        query = AnalyticsQuery(intent="chart", entities=["projects"], metrics=["count"], chart_type="pie")
+        sql, _ = generator.generate_sql(query, "admin", None)
+
+        assert "mv_" not in sql
+
+
+class TestSkeletonCache:
+    """Static SELECT/FROM/GROUP BY parts are built once per entity and chart kind"""
+
+    def test_chart_skeleton_reused_across_filters(self, generator):
+        for status in ("active", "paused"):
+            query = AnalyticsQuery(intent="chart", entities=["stages"], chart_type="bar",
+                                   filters=FilterOptions(status=status))
+            sql, params = generator.generate_sql(query, "admin", None)
+            assert params == {"status": status}
+
+        assert sql.endswith("WHERE s.status = %(status)s\nGROUP BY s.stage_project_id\nORDER BY value DESC\nLIMIT 20")
+        assert generator._chart_skeleton("stages", "default") is generator._chart_skeleton("stages", "default")
+
+    def test_statistics_skeleton_has_progress_metrics(self, generator):
+        query = AnalyticsQuery(intent="statistics", entities=["projects"])
+        sql, _ = generator.generate_sql(query, "guest", None)
+
+        assert sql.startswith("SELECT\n    COUNT(*) as total_count,")
+        assert sql.endswith("FROM projects p\nWHERE p.project_status IN ('active', 'completed')")
+
+
+class TestSelectClauses:
+    """SELECT column lists are built once per entity and requested columns"""
+
+    def test_report_skips_id_columns(self, generator):
+        clause = generator._report_select_clause("projects", ("name", "id", "status"))
+
+        assert clause == "p.project_name, p.project_status"
+        assert generator._report_select_clause("projects", ("name", "id", "status")) is clause
+
+    def test_complex_join_budget_columns(self, generator):
+        query = AnalyticsQuery(intent="complex_join", entities=["projects", "v_budgets_full"],
+                               requested_columns=["name", "spent"])
+        sql, _ = generator.generate_sql(query, "admin", None)
+
+        assert sql.startswith("SELECT\n    p.project_name,\n    b.total_spent\nFROM projects p")
+
+
+class TestJoinConditions:
+    """JOIN conditions from the relation index and fallback rules"""
+
+    @pytest.mark.parametrize("primary, related, expected", [
+        ("projects", "stages", "s.project_id = p.project_id"),
+        ("stages", "projects", "p.project_id = s.stage_project_id"),
+        ("projects", "v_budgets_full", "b.entity_id = p.project_id"),
+        ("objects", "v_budgets_full", "b.entity_id = o.object_id AND b.entity_type = 'object'"),
+        ("unknown", "projects", None),
+    ])
+    def test_find_join_condition(self, generator, primary, related, expected):
+        primary_alias = SQLGenerator.SCHEMA.get(primary, {}).get("alias", "x")
+        related_alias = SQLGenerator.SCHEMA[related]["alias"]
+
+        assert generator._find_join_condition(primary, primary_alias, related, related_alias) == expected
+
+    def test_join_condition_is_cached(self, generator):
+        first = generator._find_join_condition("objects", "o", "profiles", "u")
+
+        assert generator._find_join_condition("objects", "o", "profiles", "u") is first
+
+    def test_auto_joins_cached_per_relation_set(self, generator):
+        joins = generator._build_auto_joins("tasks", frozenset({"responsible"}))
+
+        assert joins == "LEFT JOIN profiles u ON u.user_id = t.task_responsible"
+        assert generator._build_auto_joins("tasks", frozenset({"responsible"})) is joins
+        assert generator._build_auto_joins("unknown", frozenset({"responsible"})) == ""
+
+
+class TestWhereClause:
+    """WHERE is emitted only when there are predicates"""
+
+    def test_no_predicates_no_where(self, generator):
+        query = AnalyticsQuery(intent="report", entities=["projects"])
+        sql, _ = generator.generate_sql(query, "admin", None)
+
+        assert sql == "SELECT\n    p.project_name\nFROM projects p\nORDER BY p.project_created DESC\nLIMIT 100"
+
+    def test_predicates_joined_with_and(self, generator):
+        query = AnalyticsQuery(intent="report", entities=["projects"], filters=FilterOptions(status="active"))
+        sql, _ = generator.generate_sql(query, "viewer", None)
+
+        assert "WHERE p.project_status = %(status)s\nAND p.project_status != 'cancelled'\nORDER BY" in sql
+
+
+class TestRBAC:
+    """Role-based row filters and their parameters"""
+
+    def test_engineer_filter_binds_user_id(self, generator):
+        query = AnalyticsQuery(intent="report", entities=["objects"])
+        sql, params = generator.generate_sql(query, "engineer", "u-1")
+
+        assert "o.object_responsible = %(user_id)s" in sql
+        assert params == {"user_id": "u-1"}
+
+    def test_engineer_without_user_id_is_not_filtered(self, generator):
+        query = AnalyticsQuery(intent="report", entities=["objects"])
+        sql, params = generator.generate_sql(query, "engineer", None)
+
+        assert "%(user_id)s" not in sql
+        assert params == {}
+
+    def test_guest_clause_is_cached(self, generator):
+        clause, binds_user_id = generator._rbac_clause("projects", "guest", False, "p")
+
+        assert clause == "p.project_status IN ('active', 'completed')"
+        assert not binds_user_id
+        assert generator._rbac_clause("projects", "guest", False, "p")[0] is clause
+
+
+class TestPersonalization:
+    """"My ..." predicates from per-entity templates"""
+
+    @pytest.mark.parametrize("entity, alias, expected", [
+        ("projects", "p", "p.project_manager = %(user_id)s"),
+        ("tasks", "t", "t.task_responsible = %(user_id)s"),
+        ("profiles", "u", None),
+    ])
+    def test_personalization_clause(self, generator, entity, alias, expected):
+        assert generator._personalization_clause(entity, alias) == expected
+
+    def test_report_binds_user_id(self, generator):
+        query = AnalyticsQuery(intent="report", entities=["sections"], personalized=True)
+        sql, params = generator.generate_sql(query, "admin", "u-1")
+
+        assert "WHERE sec.section_responsible = %(user_id)s" in sql
+        assert params == {"user_id": "u-1"}
+
+
+class TestPlanCache:
+    """Queries with the same shape share cached SQL text; only params differ"""
+
+    def test_comparison_plan_shared_between_users(self, generator):
+        query = AnalyticsQuery(intent="comparison", entities=["objects"], personalized=True,
+                               filters=FilterOptions(status="active"))
+
+        first_sql, first_params = generator.generate_sql(query, "engineer", "u-1")
+        second_sql, second_params = generator.generate_sql(query, "engineer", "u-2")
+
+        assert second_sql is first_sql
+        assert first_params == {"status": "active", "user_id": "u-1"}
+        assert second_params == {"status": "active", "user_id": "u-2"}
+
+    def test_plans_shared_between_instances(self):
+        import gc
+        import weakref
+
+        generator = SQLGenerator()
+        ref = weakref.ref(generator)
+        query = AnalyticsQuery(intent="comparison", entities=["objects"])
+        sql, _ = generator.generate_sql(query, "viewer", None)
+
+        del generator
+        gc.collect()
+
+        assert ref() is None
+        assert SQLGenerator().generate_sql(query, "viewer", None)[0] is sql
+
+    def test_generic_plan_depends_on_filter_shape(self, generator):
+        single = AnalyticsQuery(intent="sql_query", entities=["tasks"], filters=FilterOptions(status="open"))
+        multiple = AnalyticsQuery(intent="sql_query", entities=["tasks"], filters=FilterOptions(status="open, done"))
+
+        single_sql, single_params = generator.generate_sql(single, "admin", None)
+        multiple_sql, multiple_params = generator.generate_sql(multiple, "admin", None)
+
+        assert "= %(status)s" in single_sql
+        assert "= ANY(%(statuses)s)" in multiple_sql
+        assert single_params == {"status": "open"}
+        assert multiple_params == {"statuses": ["open", "done"]}
+
+    def test_ranking_plan_shared_between_users(self, generator):
+        query = AnalyticsQuery(intent="ranking", entities=["objects"], group_by_entity="profiles",
+                               filters=FilterOptions(status="active"))
+
+        first_sql, first_params = generator.generate_sql(query, "engineer", "u-1")
+        second_sql, second_params = generator.generate_sql(query, "engineer", "u-2")
+
+        assert second_sql is first_sql
+        assert "o.object_responsible = %(user_id)s" in first_sql
+        assert first_params == {"status": "active", "user_id": "u-1"}
+        assert second_params == {"status": "active", "user_id": "u-2"}
+
+    def test_ranking_limit_is_clamped(self, generator):
+        query = AnalyticsQuery(intent="ranking", entities=["projects"], limit=1000, order_direction="asc")
+        sql, _ = generator.generate_sql(query, "admin", None)
+
+        assert sql.endswith("ORDER BY count ASC\nLIMIT 100")